@@ -1,5 +1,6 @@
 import yfinance as yf
 import pandas as pd
+import fx
 
 tickers = {
     'ASML': 'ASML',
@@ -8,16 +9,36 @@ tickers = {
     'KLA Corp': 'KLAC'
 }
 
+# Yahoo quotes market cap / EV in the listing currency but EBITDA in the
+# reporting currency, so ADRs such as ASML mix USD and EUR in EV/EBITDA.
+rates = fx.load()
+if rates is None:
+    print("Warning: no data/fx_rates.csv - run fx.py first; EV/EBITDA left as reported")
+
 data = []
 for name, ticker in tickers.items():
     stock = yf.Ticker(ticker)
     info = stock.info
+    quote_ccy = info.get('currency', 'USD')
+    report_ccy = info.get('financialCurrency', quote_ccy)
+
+    ev_ebitda = info.get('enterpriseToEbitda', 0)
+    ev, ebitda = info.get('enterpriseValue'), info.get('ebitda')
+    if rates is not None and quote_ccy != report_ccy and ev and ebitda:
+        ev_ebitda = rates.convert(ev, quote_ccy, report_ccy) / ebitda
+
+    mcap = info.get('marketCap', 0)
+    mcap_eur = rates.convert(mcap, quote_ccy, 'EUR') if rates is not None else float('nan')
+
     data.append({
         'Company': name,
-        'Market Cap ($B)': round(info.get('marketCap', 0) / 1e9, 2),
+        'Market Cap ($B)': round(mcap / 1e9, 2),
         'P/E': round(info.get('trailingPE', 0), 2),
-        'EV/EBITDA': round(info.get('enterpriseToEbitda', 0), 2),
-        'Beta': round(info.get('beta', 0), 2)
+        'EV/EBITDA': round(ev_ebitda, 2),
+        'Beta': round(info.get('beta', 0), 2),
+        'Market Cap (EUR B)': round(mcap_eur / 1e9, 2),
+        'Currency': quote_ccy,
+        'Reporting Currency': report_ccy,
     })
 
 df = pd.DataFrame(data)
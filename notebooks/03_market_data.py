@@ -1,6 +1,9 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
+import fx
+import wacc
+import bars
 
 # Treasury rate
 treasury = yf.Ticker("^TNX")
@@ -23,12 +26,30 @@ spy_ret = spy_ret.loc[common]
 beta = np.cov(asml_ret, spy_ret)[0][1] / np.var(spy_ret)
 re = rf + beta * mrp
 
+# High-frequency beta and realized volatility from the intraday bar store
+# (bars.py), over the last year of stored 1-minute bars; NaN until collected
+hf = bars.risk_inputs("ASML")
+
+# Full WACC from the stored statements (cost of debt, market-value weights);
+# the FX history for the EUR/USD price conversion is fetched on first use
+fund = wacc.load_fundamentals(["ASML"])
+table = wacc.compute(fund, beta=beta, rf=rf, mrp=mrp,
+                     equity_value=wacc.market_equity(fund, fx.load_or_fetch()))
+w = table.latest("ASML")
+
 # Save
 market_data = {
     'risk_free_rate': rf,
     'market_risk_premium': mrp,
     'beta': beta,
-    'cost_of_equity': re
+    'hf_beta': hf['hf_beta'],
+    'realized_vol': hf['realized_vol'],
+    'cost_of_equity': re,
+    'pre_tax_cost_of_debt': w['pre_tax_cost_of_debt'],
+    'after_tax_cost_of_debt': w['after_tax_cost_of_debt'],
+    'equity_weight': w['equity_weight'],
+    'unlevered_beta': w['unlevered_beta'],
+    'wacc': w['wacc']
 }
 
 pd.DataFrame([market_data]).to_csv('../data/market_data.csv', index=False)
@@ -37,5 +58,11 @@ print(f"""
 Market Data:
 Risk-Free: {rf*100:.2f}%
 Beta: {beta:.3f}
+HF Beta (5-min, {hf['hf_returns']:,} returns): {hf['hf_beta']:.3f}
+Realized Volatility: {hf['realized_vol']*100:.1f}%
 Cost of Equity: {re*100:.2f}%
+After-tax Cost of Debt: {w['after_tax_cost_of_debt']*100:.2f}%
+Equity Weight: {w['equity_weight']*100:.1f}%
+Unlevered Beta: {w['unlevered_beta']:.3f}
+WACC: {w['wacc']*100:.2f}%
 """)
\ No newline at end of file
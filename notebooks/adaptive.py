@@ -0,0 +1,194 @@
+"""
+ASML Valuation Analysis — Adaptive Sensitivity Grid
+Samples DCF value per share over a WACC × terminal-growth rectangle the
+way the Sensitivity tab does, but instead of a fixed 0.5% grid it starts
+coarse and recursively splits (quad-tree) only the cells that matter:
+
+    - the current-price contour passes through the cell (break-even), or
+    - value changes steeply across it (WACC approaching g), or
+    - part of the cell is undefined (WACC ≤ g).
+
+Corners live on a dyadic integer lattice, so a point shared by
+neighbouring cells is valued once. Each refinement level is one batched
+``valuation.value`` call. The result is a set of leaf cells with corner
+values. ``AdaptiveGrid.to_dense`` rasterises it (bilinear within each
+leaf) for heatmaps and the break-even contour drawn by generate_charts.py.
+
+Usage:
+    cd notebooks
+    python adaptive.py                         # default range, print summary
+    python adaptive.py --wacc 0.05 0.13 --growth 0.015 0.05 --depth 6
+"""
+
+import argparse
+import numpy as np
+
+import valuation
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+# Wider than the Sensitivity tab (8–13%) on the WACC side, so the range
+# reaches both the break-even contour and the WACC → g blow-up.
+WACC_RANGE   = (0.05, 0.13)
+GROWTH_RANGE = (0.015, 0.05)
+COARSE       = 4        # initial cells per axis
+DEPTH        = 5        # maximum number of splits below the coarse grid
+REL_TOL      = 0.15     # split when corner values differ by more than this
+
+# ─────────────────────────────────────────────
+# 1.  RESULT
+# ─────────────────────────────────────────────
+
+class AdaptiveGrid:
+    """Leaf cells of the quad-tree with their corner values.
+
+    Cells are stored as lattice coordinates: ``i`` (WACC axis), ``j``
+    (growth axis) and ``size``. ``points`` maps every valued lattice
+    point to its value per share.
+    """
+
+    def __init__(self, wacc_range, growth_range, n, i, j, size, points, price):
+        self.wacc_range = wacc_range
+        self.growth_range = growth_range
+        self.n = n
+        self.i, self.j, self.size = i, j, size
+        self.points = points
+        self.price = price
+
+    @property
+    def n_evals(self):
+        return len(self.points)
+
+    @property
+    def dense_evals(self):
+        """Evaluations a uniform grid at the finest resolution would need."""
+        return (self.n + 1) ** 2
+
+    def waccs(self, i):
+        lo, hi = self.wacc_range
+        return lo + (hi - lo) * np.asarray(i) / self.n
+
+    def growths(self, j):
+        lo, hi = self.growth_range
+        return lo + (hi - lo) * np.asarray(j) / self.n
+
+    def bounds(self):
+        """(wacc_lo, wacc_hi, growth_lo, growth_hi) for every leaf."""
+        return (self.waccs(self.i), self.waccs(self.i + self.size),
+                self.growths(self.j), self.growths(self.j + self.size))
+
+    def corners(self):
+        """(cells, 4) values at (i0,j0), (i1,j0), (i0,j1), (i1,j1)."""
+        return _corner_values(self.points, self.i, self.j, self.size)
+
+    def to_dense(self):
+        """Rasterise the leaves onto the finest lattice.
+
+        Returns (waccs, growths, values) with values shaped (growths, waccs),
+        matching ``valuation.sensitivity``; inside each leaf the value is
+        bilinear in its corners.
+        """
+        out = np.full((self.n + 1, self.n + 1), np.nan)
+        c = self.corners()
+        for s in np.unique(self.size):
+            sel = self.size == s
+            u = np.linspace(0, 1, s + 1)
+            # (cells, s+1 growth, s+1 wacc) bilinear patches
+            v00, v10, v01, v11 = (c[sel, k][:, None, None] for k in range(4))
+            uy, ux = u[None, :, None], u[None, None, :]
+            with np.errstate(invalid="ignore"):
+                patch = (v00 * (1 - ux) * (1 - uy) + v10 * ux * (1 - uy)
+                         + v01 * (1 - ux) * uy + v11 * ux * uy)
+            rows = self.j[sel][:, None] + np.arange(s + 1)
+            cols = self.i[sel][:, None] + np.arange(s + 1)
+            out[rows[:, :, None], cols[:, None, :]] = patch
+        grid = np.arange(self.n + 1)
+        return self.waccs(grid), self.growths(grid), out
+
+# ─────────────────────────────────────────────
+# 2.  REFINEMENT
+# ─────────────────────────────────────────────
+
+def _corner_values(points, i, j, size):
+    keys = [(i, j), (i + size, j), (i, j + size), (i + size, j + size)]
+    return np.stack([np.fromiter((points[a, b] for a, b in zip(x, y)), float, len(x))
+                     for x, y in keys], axis=-1)
+
+
+def _evaluate(m, points, i, j, size, to_wacc, to_growth, overrides):
+    """Value every not-yet-seen corner of the given cells in one batch."""
+    ii = np.concatenate([i, i + size, i, i + size])
+    jj = np.concatenate([j, j, j + size, j + size])
+    new = np.unique(np.stack([ii, jj], axis=1), axis=0)
+    new = new[[(a, b) not in points for a, b in new]] if len(points) else new
+    if len(new):
+        v = valuation.value(m, **{**overrides, "wacc": to_wacc(new[:, 0]),
+                                  "terminal_growth": to_growth(new[:, 1])})["per_share"]
+        points.update(zip(map(tuple, new.tolist()), v.tolist()))
+
+
+def _split(c, price, rel_tol):
+    """Which cells to refine, from their (cells, 4) corner values."""
+    valid = np.isfinite(c) & (c > 0)
+    mixed = valid.any(axis=1) & ~valid.all(axis=1)
+    with np.errstate(invalid="ignore"):
+        lo, hi = c.min(axis=1), c.max(axis=1)
+        steep = (hi - lo) > rel_tol * np.abs(c.mean(axis=1))
+        crossing = (lo < price) & (hi > price)
+    return mixed | (valid.all(axis=1) & (steep | crossing))
+
+
+def refine(m, wacc_range=WACC_RANGE, growth_range=GROWTH_RANGE, price=None,
+           coarse=COARSE, depth=DEPTH, rel_tol=REL_TOL, **overrides):
+    """Adaptive quad-tree sampling of value per share over WACC × g.
+
+    ``price`` defaults to the model's current share price; ``overrides``
+    are passed to ``valuation.value`` (e.g. a different margin path).
+    """
+    price = m["price"] if price is None else price
+    n = coarse * 2 ** depth
+    grid = AdaptiveGrid(wacc_range, growth_range, n, None, None, None, {}, price)
+    points = grid.points
+
+    size = np.full(coarse * coarse, 2 ** depth)
+    i, j = (a.ravel() * 2 ** depth for a in np.meshgrid(np.arange(coarse), np.arange(coarse)))
+    leaves = []
+    for level in range(depth + 1):
+        _evaluate(m, points, i, j, size, grid.waccs, grid.growths, overrides)
+        split = _split(_corner_values(points, i, j, size), price, rel_tol)
+        if level == depth:
+            split[:] = False
+        leaves.append((i[~split], j[~split], size[~split]))
+        if not split.any():
+            break
+        i, j, half = i[split], j[split], size[split] // 2
+        i = np.concatenate([i, i + half, i, i + half])
+        j = np.concatenate([j, j, j + half, j + half])
+        size = np.concatenate([half] * 4)
+
+    grid.i, grid.j, grid.size = (np.concatenate(a) for a in zip(*leaves))
+    return grid
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--wacc", nargs=2, type=float, default=WACC_RANGE, metavar=("LO", "HI"))
+    ap.add_argument("--growth", nargs=2, type=float, default=GROWTH_RANGE, metavar=("LO", "HI"))
+    ap.add_argument("--depth", type=int, default=DEPTH)
+    ap.add_argument("--tol", type=float, default=REL_TOL)
+    args = ap.parse_args()
+
+    m = valuation.load_model()
+    g = refine(m, tuple(args.wacc), tuple(args.growth), depth=args.depth, rel_tol=args.tol)
+    waccs, growths, dense = g.to_dense()
+    print(f"\nAdaptive grid: {len(g.size)} leaf cells, {g.n_evals} valuations "
+          f"vs. {g.dense_evals} for a dense {g.n + 1}×{g.n + 1} grid "
+          f"({g.n_evals / g.dense_evals:.1%})")
+    print(f"Break-even WACC (value = €{g.price:,.0f}) by terminal growth:")
+    for k in range(0, g.n + 1, max(1, g.n // 8)):
+        with np.errstate(invalid="ignore"):
+            above = np.flatnonzero(dense[k] > g.price)
+        where = f"≈ {waccs[above[-1]]:.2%}" if len(above) else f"below {waccs[0]:.2%}"
+        print(f"   g = {growths[k]:.2%}  →  WACC {where}")
@@ -0,0 +1,292 @@
+"""
+ASML Valuation Analysis — Intraday Bar Store
+Keeps 1-minute / 5-minute bars per ticker in flat binary column files and
+reads them through memory maps. Nothing here loads a whole file: a time
+range is found by binary search on the timestamp column, slices are
+zero-copy views of the maps, and the statistics run over fixed-size row
+chunks or time windows.
+
+Layout (one directory per ticker and interval, one file per column):
+
+    data/bars/<TICKER>/<interval>/ts.i8        int64 UTC nanoseconds, increasing
+                                  open.f4 high.f4 low.f4 close.f4 volume.f4
+
+Appends only add bars newer than the last stored one. The number of rows
+is the length of the shortest column, so an interrupted append is trimmed
+on the next write instead of misaligning the columns.
+
+The statistics feed the cost-of-equity inputs in 03_market_data.py:
+
+    - realized volatility: per-session sums of squared intraday log
+      returns (overnight gaps excluded), annualised;
+    - high-frequency beta: Σ r_a·r_m / Σ r_m² over returns sampled every
+      five minutes on buckets both series traded in.
+
+Usage:
+    cd notebooks
+    python bars.py                          # append the latest 1m bars for ASML and SPY
+    python bars.py AMAT LRCX --interval 5m
+    python bars.py --stats ASML             # realized vol and HF beta vs SPY, last year
+"""
+
+import os
+import argparse
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE    = os.path.dirname(os.path.abspath(__file__))
+BAR_DIR = os.path.join(HERE, "..", "data", "bars")
+
+COLUMNS = {"ts": np.int64, "open": np.float32, "high": np.float32,
+           "low": np.float32, "close": np.float32, "volume": np.float32}
+SUFFIX  = {np.int64: "i8", np.float32: "f4"}
+
+# interval -> longest lookback Yahoo serves for it
+INTERVALS = {"1m": "7d", "5m": "60d"}
+MARKET    = "SPY"
+
+NS          = 1_000_000_000
+SESSION_GAP = 2 * 3600 * NS       # a longer gap between bars starts a new session
+BETA_EVERY  = 300                 # seconds between beta returns (damps bid-ask bounce)
+ANNUAL      = 252                 # sessions per year
+LOOKBACK    = 365                 # days of bars behind risk_inputs
+CHUNK       = 1 << 20             # rows per pass
+WINDOW      = 30 * 86400 * NS     # time window per beta pass
+
+Bars = namedtuple("Bars", COLUMNS)
+
+# ─────────────────────────────────────────────
+# 1.  STORE
+# ─────────────────────────────────────────────
+
+def _ns(t):
+    """Timestamp-like → int64 UTC nanoseconds (naive times are UTC); None stays None."""
+    if t is None:
+        return None
+    t = pd.Timestamp(t)
+    return (t.tz_localize("UTC") if t.tz is None else t).value
+
+
+class BarStore:
+    """One ticker's bars at one interval, memory-mapped column by column."""
+
+    def __init__(self, ticker, interval="1m", root=BAR_DIR):
+        self.ticker, self.interval = ticker, interval
+        self.path = os.path.join(root, ticker, interval)
+        self._maps = None
+
+    def _file(self, col):
+        return os.path.join(self.path, f"{col}.{SUFFIX[COLUMNS[col]]}")
+
+    def __len__(self):
+        sizes = [os.path.getsize(self._file(c)) // np.dtype(t).itemsize
+                 if os.path.exists(self._file(c)) else 0 for c, t in COLUMNS.items()]
+        return min(sizes)
+
+    @property
+    def columns(self):
+        """Read-only memory maps of every column (empty arrays for an empty store)."""
+        if self._maps is None:
+            n = len(self)
+            self._maps = Bars(*(np.memmap(self._file(c), dtype=t, mode="r", shape=(n,))
+                                if n else np.empty(0, dtype=t) for c, t in COLUMNS.items()))
+        return self._maps
+
+    def span(self):
+        """(first, last) timestamp in ns, or None when empty."""
+        ts = self.columns.ts
+        return (int(ts[0]), int(ts[-1])) if len(ts) else None
+
+    def rows(self, start=None, end=None):
+        """Row range [i, j) covering [start, end) — two binary searches."""
+        ts = self.columns.ts
+        i = 0 if start is None else int(np.searchsorted(ts, _ns(start), side="left"))
+        j = len(ts) if end is None else int(np.searchsorted(ts, _ns(end), side="left"))
+        return i, max(i, j)
+
+    def slice(self, start=None, end=None):
+        """Bars in [start, end) as zero-copy views of the maps."""
+        i, j = self.rows(start, end)
+        return Bars(*(c[i:j] for c in self.columns))
+
+    def chunks(self, start=None, end=None, rows=CHUNK):
+        """Yield consecutive views of at most ``rows`` bars over [start, end)."""
+        i, j = self.rows(start, end)
+        cols = self.columns
+        for k in range(i, j, rows):
+            yield Bars(*(c[k:min(k + rows, j)] for c in cols))
+
+    def append(self, bars):
+        """Add bars newer than the last stored one; returns the number added.
+
+        ``bars`` maps column names to arrays (``ts`` in UTC nanoseconds).
+        """
+        new = {c: np.asarray(bars[c], dtype=t) for c, t in COLUMNS.items()}
+        order = np.argsort(new["ts"], kind="stable")
+        ts = new["ts"][order]
+        keep = np.r_[True, np.diff(ts) > 0]          # one bar per timestamp
+        n = len(self)
+        if n:
+            keep &= ts > self.columns.ts[-1]
+        self._maps = None
+        if not keep.any():
+            return 0
+        os.makedirs(self.path, exist_ok=True)
+        for c, t in COLUMNS.items():
+            path = self._file(c)
+            if os.path.exists(path):
+                os.truncate(path, n * np.dtype(t).itemsize)
+            with open(path, "ab") as f:
+                f.write(np.ascontiguousarray(new[c][order][keep]).tobytes())
+        return int(keep.sum())
+
+
+def from_frame(df):
+    """Columns for ``BarStore.append`` from a Yahoo-style OHLCV DataFrame."""
+    idx = pd.DatetimeIndex(df.index)
+    idx = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+    out = {c: df[c.capitalize()].to_numpy() for c in COLUMNS if c != "ts"}
+    out["ts"] = idx.as_unit("ns").asi8
+    return out
+
+
+def update(ticker, interval="1m", root=BAR_DIR):
+    """Append the bars Yahoo currently serves for ``ticker`` at ``interval``."""
+    import yfinance as yf
+
+    df = yf.Ticker(ticker).history(period=INTERVALS[interval], interval=interval)
+    if df.empty:
+        return 0
+    return BarStore(ticker, interval, root).append(from_frame(df))
+
+# ─────────────────────────────────────────────
+# 2.  REALIZED VOLATILITY
+# ─────────────────────────────────────────────
+
+def realized_variance(store, start=None, end=None, rows=CHUNK):
+    """Per-session realized variance over [start, end).
+
+    Returns a Series indexed by each session's first bar (UTC). The last
+    bar of a chunk is carried into the next, so the result does not depend
+    on ``rows``.
+    """
+    rv, starts = np.zeros(0), []
+    sid, prev = 0, None
+    for b in store.chunks(start, end, rows):
+        lc = np.log(b.close, dtype=np.float64)
+        if prev is None:
+            ts, lc_all = b.ts, lc
+            starts.append(b.ts[:1])
+        else:
+            ts, lc_all = np.r_[prev[0], b.ts], np.r_[prev[1], lc]
+        new = np.diff(ts) > SESSION_GAP
+        starts.append(ts[1:][new])
+        ids = sid + np.cumsum(new)
+        r2 = np.diff(lc_all) ** 2
+        if len(ids):
+            hi = int(ids[-1])
+            rv = np.pad(rv, (0, hi + 1 - len(rv)))
+            rv[sid:hi + 1] += np.bincount(ids[~new] - sid, weights=r2[~new], minlength=hi + 1 - sid)
+            sid = hi
+        else:
+            rv = np.pad(rv, (0, max(0, sid + 1 - len(rv))))
+        prev = (b.ts[-1], lc[-1])
+    idx = pd.DatetimeIndex(np.concatenate(starts).view("datetime64[ns]") if starts else [], tz="UTC")
+    return pd.Series(rv, index=idx, name="realized_variance")
+
+
+def realized_vol(store, start=None, end=None, rows=CHUNK):
+    """Annualised volatility from the mean per-session realized variance."""
+    rv = realized_variance(store, start, end, rows)
+    return float(np.sqrt(ANNUAL * rv.mean())) if len(rv) else np.nan
+
+# ─────────────────────────────────────────────
+# 3.  HIGH-FREQUENCY BETA
+# ─────────────────────────────────────────────
+
+def _last_per_bucket(ts, close, step):
+    """(bucket ids, log close) of the last bar in each ``step``-ns bucket."""
+    b = ts // step
+    last = np.r_[np.flatnonzero(np.diff(b)), len(b) - 1] if len(b) else np.empty(0, dtype=int)
+    return b[last], np.log(close[last], dtype=np.float64)
+
+
+def hf_beta(asset, market, start=None, end=None, every=BETA_EVERY, window=WINDOW):
+    """Realized beta of ``asset`` on ``market`` (both ``BarStore``) over [start, end).
+
+    Returns {"beta", "correlation", "returns"}. Only buckets in which both
+    traded are used, and returns spanning a session gap are dropped. The
+    range is walked in ``window``-long slices, carrying the last common
+    bucket across slice edges.
+    """
+    spans = [asset.span(), market.span()]
+    if None in spans:
+        return {"beta": np.nan, "correlation": np.nan, "returns": 0}
+    lo = max(s[0] for s in spans) if start is None else _ns(start)
+    hi = min(s[1] for s in spans) + 1 if end is None else _ns(end)
+    step = every * NS
+    sxy = sxx = syy = 0.0
+    n, carry = 0, None
+    for w0 in range(lo, hi, window):
+        w1 = min(w0 + window, hi)
+        a, m = asset.slice(w0, w1), market.slice(w0, w1)
+        ka, la = _last_per_bucket(a.ts, a.close, step)
+        km, lm = _last_per_bucket(m.ts, m.close, step)
+        k, ia, im = np.intersect1d(ka, km, assume_unique=True, return_indices=True)
+        xa, xm = la[ia], lm[im]
+        if carry is not None:
+            k, xa, xm = np.r_[carry[0], k], np.r_[carry[1], xa], np.r_[carry[2], xm]
+        if len(k) == 0:
+            continue
+        same = np.diff(k) * step <= SESSION_GAP
+        ra, rm = np.diff(xa)[same], np.diff(xm)[same]
+        sxy += ra @ rm
+        sxx += rm @ rm
+        syy += ra @ ra
+        n += len(rm)
+        carry = (k[-1], xa[-1], xm[-1])
+    if n == 0 or sxx == 0:
+        return {"beta": np.nan, "correlation": np.nan, "returns": n}
+    return {"beta": sxy / sxx, "correlation": sxy / np.sqrt(sxx * syy), "returns": n}
+
+
+def risk_inputs(ticker, market=MARKET, interval="1m", days=LOOKBACK, root=BAR_DIR):
+    """Realized vol and HF beta over the last ``days`` of stored bars (NaN if none)."""
+    asset, mkt = BarStore(ticker, interval, root), BarStore(market, interval, root)
+    span = asset.span()
+    if span is None:
+        return {"hf_beta": np.nan, "realized_vol": np.nan, "hf_returns": 0}
+    start = span[1] - days * 86400 * NS
+    beta = hf_beta(asset, mkt, start)
+    return {"hf_beta": beta["beta"], "realized_vol": realized_vol(asset, start),
+            "hf_returns": beta["returns"]}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("tickers", nargs="*", metavar="TICKER")
+    ap.add_argument("--interval", choices=list(INTERVALS), default="1m")
+    ap.add_argument("--stats", action="store_true",
+                    help=f"print realized vol and HF beta vs {MARKET} instead of fetching")
+    args = ap.parse_args()
+
+    if args.stats:
+        for t in args.tickers or ["ASML"]:
+            r = risk_inputs(t, interval=args.interval)
+            print(f"{t}: realized vol {r['realized_vol']:.1%}, HF beta {r['hf_beta']:.3f} "
+                  f"({r['hf_returns']:,} {BETA_EVERY // 60}-minute returns)")
+    else:
+        for t in dict.fromkeys((args.tickers or ["ASML"]) + [MARKET]):
+            try:
+                added = update(t, args.interval)
+            except Exception as e:          # delisted / renamed tickers
+                print(f"   Warning: {t} skipped ({e})")
+                continue
+            store = BarStore(t, args.interval)
+            print(f"  ✓  {t} {args.interval}: +{added:,} bars ({len(store):,} stored)")
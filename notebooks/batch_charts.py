@@ -0,0 +1,380 @@
+"""
+ASML Valuation Analysis — Batch Chart Renderer
+Draws the five README charts (revenue, margins, DCF bridge, peer
+multiples, sensitivity heatmap) for many companies at once.
+
+generate_charts.py builds every figure from scratch, and for one company
+that is fine. For hundreds of companies the setup (subplots, styling,
+formatters, colour maps, text artists) costs more than the drawing. Here
+each chart is built once per worker process as a template. For each
+company only the data artists change: bar heights and offsets, heatmap
+array and norm, label text. The template is then redrawn. PNGs are
+encoded from the raw RGBA buffer by a thread pool while the next chart
+draws; SVGs are written directly.
+
+Valuations for the whole batch come from one stacked
+``valuation.value`` / ``valuation.sensitivity`` call.
+
+Usage:
+    cd notebooks
+    python batch_charts.py ../models/*.xlsx            # full-size PNGs
+    python batch_charts.py ../models/*.xlsx --thumb    # small PNG thumbnails
+    python batch_charts.py ../models/*.xlsx --svg
+    python batch_charts.py --bench 200 -j 4            # throughput check
+
+Output:
+    ../outputs/charts/batch/<company>/01_revenue_growth.png … 05_sensitivity_heatmap.png
+"""
+
+import os
+import re
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
+import matplotlib.ticker as mticker
+import seaborn as sns
+from PIL import Image
+
+import valuation
+from chart_style import (BLUE_DARK, BLUE_MID, BLUE_LIGHT, GREY_DARK, GREY_LIGHT,
+                         GREEN, RED, AMBER, WHITE, ACCENT, style)
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE     = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR  = os.path.join(HERE, "..", "outputs", "charts", "batch")
+
+DPI       = 180
+THUMB_DPI = 48
+PNG_COMPRESS = 3          # zlib level: 1 fastest … 9 smallest
+ENCODERS  = 4             # PNG encoder threads per worker process
+MAX_PEERS = 6
+
+CHARTS = ("01_revenue_growth", "02_margin_analysis", "03_dcf_waterfall",
+          "04_peer_comparison", "05_sensitivity_heatmap")
+
+# ─────────────────────────────────────────────
+# 1.  CHART DATA (one vectorised valuation pass)
+# ─────────────────────────────────────────────
+
+def chart_data(models):
+    """Everything the five charts show, one dict per company."""
+    stacked = valuation.stack_models(models)
+    r = valuation.value(stacked)
+    waccs, growths = models[0]["sens_waccs"], models[0]["sens_growths"]
+    grid = valuation.sensitivity(stacked, waccs, growths)
+
+    out = []
+    for i, m in enumerate(models):
+        rev = np.asarray(m["hist_revenue"], dtype=float)
+        peers = m["peers"][:MAX_PEERS]
+        out.append({
+            "name":        m["company"],
+            "hist_years":  np.asarray(m["hist_years"]),
+            "years":       np.asarray(m["years"]),
+            "revenue":     np.concatenate([rev, r["revenue"][i]]),
+            "margins":     np.stack([np.asarray(m["hist_gross_margin"], dtype=float),
+                                     np.asarray(m["hist_ebit"]) / rev,
+                                     np.asarray(m["hist_net_income"]) / rev]) * 100,
+            "bridge":      (r["pv_fcfs"][i], r["pv_tv"][i], r["ev"][i],
+                            m["cash"], m["debt"], r["equity"][i]),
+            "per_share":   r["per_share"][i],
+            "price":       m["price"],
+            "peers":       [p["name"] for p in peers],
+            "ev_ebitda":   [p["ev_ebitda"] for p in peers],
+            "pe":          [p["pe"] for p in peers],
+            "waccs":       waccs,
+            "growths":     growths,
+            "grid":        grid[i],
+        })
+    return out
+
+# ─────────────────────────────────────────────
+# 2.  TEMPLATES
+# ─────────────────────────────────────────────
+# Each builder creates the figure once and returns (fig, update), where
+# update(d) only touches data artists.
+
+def _eur(v):
+    return f"€{v/1000:.0f}B" if abs(v) >= 1000 else f"€{v:.0f}M"
+
+
+def _revenue(n_hist, n_proj):
+    fig, ax = plt.subplots(figsize=(11, 5.5))
+    fig.subplots_adjust(left=0.09, right=0.98, bottom=0.14, top=0.9)
+    x = np.arange(n_hist + n_proj)
+    bars = ax.bar(x, np.zeros(len(x)), width=0.65, zorder=3,
+                  color=[BLUE_DARK] * n_hist + [BLUE_LIGHT] * n_proj)
+    labels = [ax.text(i, 0, "", ha="center", va="bottom", fontsize=7.5,
+                      color=BLUE_DARK, fontweight="bold") for i in x]
+    ax.axvline(n_hist - 0.5, color=GREY_DARK, linewidth=1.2, linestyle="--", alpha=0.6)
+    ax.set_xticks(x)
+    ax.set_ylabel("EUR (Millions)")
+    ax.yaxis.set_major_formatter(mticker.FuncFormatter(lambda v, _: f"€{v:,.0f}"))
+    cagr = ax.text(0.01, 0.94, "", transform=ax.transAxes, fontsize=8.5, color=BLUE_DARK,
+                   bbox=dict(facecolor=GREY_LIGHT, edgecolor="none", pad=4, alpha=0.8))
+    title = ax.set_title("")
+
+    def update(d):
+        rev, top = d["revenue"], d["revenue"].max()
+        for bar, lbl, v in zip(bars, labels, rev):
+            bar.set_height(v)
+            lbl.set_y(v + top * 0.012)
+            lbl.set_text(_eur(v))
+        ax.set_ylim(0, top * 1.12)
+        years = list(d["hist_years"]) + [f"{y}E" for y in d["years"]]
+        ax.set_xticklabels([str(y) for y in years], rotation=35, ha="right")
+        h, p = rev[:n_hist], rev[n_hist:]
+        cagr.set_text(f"Historical CAGR: {(h[-1] / h[0]) ** (1 / (n_hist - 1)) - 1:.1%}   |   "
+                      f"Projected CAGR: {(p[-1] / p[0]) ** (1 / (n_proj - 1)) - 1:.1%}")
+        title.set_text(f"{d['name']} Net Sales — Historical & Projected "
+                       f"({years[0]}–{d['years'][-1]})")
+    return fig, update
+
+
+def _margins(n_hist):
+    fig, ax = plt.subplots(figsize=(9, 5))
+    fig.subplots_adjust(left=0.1, right=0.88, bottom=0.1, top=0.9)   # room for the averages
+    x, w = np.arange(n_hist), 0.28
+    groups = [ax.bar(x + off, np.zeros(n_hist), width=w, color=c, label=lbl, zorder=3)
+              for off, c, lbl in ((-w, BLUE_DARK, "Gross Margin"),
+                                  (0, BLUE_LIGHT, "Operating Margin"),
+                                  (w, ACCENT, "Net Margin"))]
+    ax.set_xticks(x)
+    ax.set_ylabel("Margin (%)")
+    ax.yaxis.set_major_formatter(mticker.FuncFormatter(lambda v, _: f"{v:.0f}%"))
+    ax.legend(frameon=False, fontsize=9)
+    avgs = [(ax.axhline(0, color=c, linestyle=":", linewidth=1, alpha=0.5),
+             ax.text(n_hist - 0.55, 0, "", fontsize=8, color=c, alpha=0.8))
+            for c in (BLUE_DARK, BLUE_LIGHT)]
+    title = ax.set_title("")
+
+    def update(d):
+        for bars, vals in zip(groups, d["margins"]):
+            for bar, v in zip(bars, vals):
+                bar.set_height(v)
+        for (line, lbl), vals, name in zip(avgs, d["margins"], ("GM", "OM")):
+            mean = vals.mean()
+            line.set_ydata([mean, mean])
+            lbl.set_y(mean + 0.6)
+            lbl.set_text(f"Avg {name} {mean:.1f}%")
+        ax.set_ylim(min(0, d["margins"].min() * 1.1), d["margins"].max() * 1.15)
+        ax.set_xticklabels([str(y) for y in d["hist_years"]])
+        title.set_text(f"{d['name']} Profitability Margins "
+                       f"({d['hist_years'][0]}–{d['hist_years'][-1]})")
+    return fig, update
+
+
+def _waterfall():
+    fig, ax = plt.subplots(figsize=(10, 5.5))
+    fig.subplots_adjust(left=0.1, right=0.97, bottom=0.14, top=0.9)
+    ticks = ["PV of FCFs", "+ PV of\nTerminal Value", "= Enterprise\nValue",
+             "+ Cash", "− Debt", "= Equity\nValue"]
+    bars = ax.bar(range(6), np.zeros(6), color=[BLUE_LIGHT, BLUE_MID, BLUE_DARK, GREEN, RED, GREEN],
+                  width=0.55, zorder=3, edgecolor=WHITE, linewidth=0.8)
+    labels = [ax.text(i, 0, "", ha="center", fontsize=8.5, fontweight="bold", color=BLUE_DARK)
+              for i in range(6)]
+    ax.set_xticks(range(6))
+    ax.set_xticklabels(ticks, fontsize=9.5)
+    ax.set_ylabel("EUR (Millions)")
+    ax.yaxis.set_major_formatter(mticker.FuncFormatter(lambda v, _: f"€{v:,.0f}"))
+    note = ax.text(0.02, 0.94, "", transform=ax.transAxes, fontsize=8.5, fontweight="bold",
+                   va="top", bbox=dict(facecolor=GREY_LIGHT, edgecolor="none", pad=4))
+    title = ax.set_title("")
+
+    def update(d):
+        pv_fcfs, pv_tv, ev, cash, debt, equity = d["bridge"]
+        heights = [pv_fcfs, pv_tv, ev, cash, debt, equity]
+        bottoms = [0, pv_fcfs, 0, ev, ev + cash - debt, 0]
+        top = max(b + h for b, h in zip(bottoms, heights))
+        for bar, lbl, h, b in zip(bars, labels, heights, bottoms):
+            bar.set_y(b)
+            bar.set_height(h)
+            lbl.set_y(b + h + top * 0.015)
+            lbl.set_text(_eur(h))
+        ax.set_ylim(0, top * 1.15)
+        ps, px = d["per_share"], d["price"]
+        note.set_text(f"Implied value per share: €{ps:,.0f}\nvs. Current price: €{px:,.0f}  "
+                      f"({'Overvalued' if ps < px else 'Undervalued'} {abs(ps / px - 1):.0%})")
+        note.set_color(RED if ps < px else GREEN)
+        title.set_text(f"DCF Valuation Bridge — {d['name']}")
+    return fig, update
+
+
+def _peers():
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5.5))
+    fig.subplots_adjust(left=0.07, right=0.98, bottom=0.2, top=0.9, wspace=0.2)
+    panels = []
+    for ax, title in zip(axes, ("EV / EBITDA", "Price / Earnings")):
+        x = np.arange(MAX_PEERS)
+        bars = ax.bar(x, np.zeros(MAX_PEERS), width=0.55, zorder=3,
+                      edgecolor=WHITE, linewidth=0.8)
+        labels = [ax.text(i, 0, "", ha="center", va="bottom", fontsize=9,
+                          fontweight="bold", color=BLUE_DARK) for i in x]
+        med = ax.axhline(0, color=AMBER, linewidth=1.4, linestyle="--", alpha=0.8)
+        med_lbl = ax.text(0, 0, "", fontsize=8, color=AMBER, ha="right", va="bottom")
+        ax.set_xticks(x)
+        ax.set_title(title)
+        ax.set_ylabel("Multiple (×)")
+        ax.yaxis.set_major_formatter(mticker.FuncFormatter(lambda v, _: f"{v:.0f}×"))
+        panels.append((ax, bars, labels, med, med_lbl))
+
+    def update(d):
+        n = len(d["peers"])
+        colors = [BLUE_DARK if p == d["name"] else BLUE_LIGHT for p in d["peers"]]
+        for (ax, bars, labels, med, med_lbl), vals in zip(panels, (d["ev_ebitda"], d["pe"])):
+            top = max(vals) if n else 1.0
+            for k, (bar, lbl) in enumerate(zip(bars, labels)):
+                shown = k < n
+                bar.set_visible(shown)
+                lbl.set_visible(shown)
+                if shown:
+                    bar.set_height(vals[k])
+                    bar.set_color(colors[k])
+                    lbl.set_y(vals[k] + top * 0.02)
+                    lbl.set_text(f"{vals[k]:.1f}×")
+            m = sorted(vals)[n // 2] if n else 0.0
+            med.set_ydata([m, m])
+            med_lbl.set_position((max(n, 1) - 0.55, m * 1.01))
+            med_lbl.set_text(f"Median {m:.1f}×")
+            ax.set_xlim(-0.5, max(n, 1) - 0.5)
+            ax.set_ylim(0, top * 1.15)
+            ax.set_xticklabels(d["peers"] + [""] * (MAX_PEERS - n), rotation=15, ha="right")
+    return fig, update
+
+
+def _heatmap(shape):
+    fig, ax = plt.subplots(figsize=(13, 6))
+    fig.subplots_adjust(left=0.08, right=1.0, bottom=0.12, top=0.86)
+    ax.grid(False)
+    cmap = sns.diverging_palette(10, 130, s=80, l=45, as_cmap=True)
+    norm = mcolors.TwoSlopeNorm(vcenter=1.0, vmin=0.0, vmax=2.0)
+    im = ax.imshow(np.ones(shape), cmap=cmap, norm=norm, aspect="auto")
+    fig.colorbar(im, ax=ax, shrink=0.85, label="DCF Value Per Share (EUR)")
+    cells = [[ax.text(c, r, "", ha="center", va="center", fontsize=8.5, fontweight="bold",
+                      color=WHITE) for c in range(shape[1])] for r in range(shape[0])]
+    ax.set_xticks(range(shape[1]))
+    ax.set_yticks(range(shape[0]))
+    ax.set_xlabel("WACC", fontsize=10, labelpad=8)
+    ax.set_ylabel("Terminal Growth Rate", fontsize=10, labelpad=8)
+    title = ax.set_title("", fontsize=11, fontweight="bold", color=BLUE_DARK, pad=12)
+
+    def update(d):
+        g, px = d["grid"], d["price"]
+        im.set_data(g)
+        lo, hi = np.nanmin(g), np.nanmax(g)
+        # TwoSlopeNorm needs vmin < vcenter < vmax
+        norm.vmin, norm.vmax = min(lo, px * 0.99), max(hi, px * 1.01)
+        norm.vcenter = px
+        for row, vals in zip(cells, g):
+            for t, v in zip(row, vals):
+                t.set_text(f"{v:.0f}")
+        ax.set_xticklabels([f"{v:.1%}" for v in d["waccs"]])
+        ax.set_yticklabels([f"{v:.1%}" for v in d["growths"]])
+        title.set_text(f"Sensitivity Analysis — {d['name']} DCF Value Per Share (EUR)\n"
+                       f"Current Price = €{px:,.0f}")
+    return fig, update
+
+# ─────────────────────────────────────────────
+# 3.  RENDERING
+# ─────────────────────────────────────────────
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(name)).strip("_") or "company"
+
+
+def _encode_png(rgba, path):
+    Image.fromarray(rgba).save(path, compress_level=PNG_COMPRESS)
+
+
+class BatchRenderer:
+    """The five chart templates plus a PNG encoder pool, for one process."""
+
+    def __init__(self, first, dpi=DPI, fmt="png", encoders=ENCODERS):
+        style()
+        self.fmt = fmt
+        n_hist, n_proj = len(first["hist_years"]), len(first["years"])
+        self.templates = [_revenue(n_hist, n_proj), _margins(n_hist), _waterfall(),
+                          _peers(), _heatmap(first["grid"].shape)]
+        for fig, _ in self.templates:
+            fig.set_dpi(dpi)
+        self.pool = ThreadPoolExecutor(encoders) if fmt == "png" else None
+        self._pending = []
+
+    def render(self, d, out_dir):
+        folder = os.path.join(out_dir, _slug(d.get("folder", d["name"])))
+        os.makedirs(folder, exist_ok=True)
+        for name, (fig, update) in zip(CHARTS, self.templates):
+            update(d)
+            path = os.path.join(folder, f"{name}.{self.fmt}")
+            if self.pool is None:
+                fig.savefig(path, format=self.fmt, facecolor=WHITE)
+            else:
+                fig.canvas.draw()
+                rgba = np.asarray(fig.canvas.buffer_rgba()).copy()
+                self._pending.append(self.pool.submit(_encode_png, rgba, path))
+
+    def close(self):
+        for f in self._pending:
+            f.result()
+        if self.pool is not None:
+            self.pool.shutdown()
+        for fig, _ in self.templates:
+            plt.close(fig)
+
+
+def _render_chunk(args):
+    data, out_dir, dpi, fmt = args
+    r = BatchRenderer(data[0], dpi, fmt)
+    for d in data:
+        r.render(d, out_dir)
+    r.close()
+    return len(data)
+
+
+def render(data, out_dir=OUT_DIR, dpi=DPI, fmt="png", workers=1):
+    """Render every company's chart set; returns the number of sets written."""
+    if workers <= 1 or len(data) < 2:
+        return _render_chunk((data, out_dir, dpi, fmt))
+    chunks = [data[k::workers] for k in range(workers) if data[k::workers]]
+    with ProcessPoolExecutor(len(chunks)) as pool:
+        return sum(pool.map(_render_chunk, [(c, out_dir, dpi, fmt) for c in chunks]))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("workbooks", nargs="*", metavar="XLSX")
+    ap.add_argument("--thumb", action="store_true", help=f"render at {THUMB_DPI} dpi")
+    ap.add_argument("--svg", action="store_true")
+    ap.add_argument("--bench", type=int, metavar="N",
+                    help="render N copies of the ASML model to time the renderer")
+    ap.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default=OUT_DIR)
+    args = ap.parse_args()
+
+    if args.bench:
+        models = [valuation.load_model()] * args.bench
+    elif args.workbooks:
+        with ProcessPoolExecutor() as pool:
+            models = list(pool.map(valuation.load_model, args.workbooks))
+    else:
+        ap.error("give workbooks or --bench N")
+
+    t0 = time.perf_counter()
+    data = chart_data(models)
+    if args.bench:
+        for k, d in enumerate(data):
+            d["folder"] = f"{d['name']}_{k:04d}"
+    n = render(data, args.out, THUMB_DPI if args.thumb else DPI,
+               "svg" if args.svg else "png", args.workers)
+    secs = time.perf_counter() - t0
+    print(f"  ✓  {n} chart sets ({n * len(CHARTS)} files) in {secs:.1f}s "
+          f"— {n / secs * 60:,.0f} sets/min, {args.workers} worker(s)")
@@ -0,0 +1,47 @@
+"""
+ASML Valuation Analysis — Chart Style
+Colour palette and matplotlib rcParams shared by generate_charts.py and
+batch_charts.py.
+"""
+
+import matplotlib.pyplot as plt
+
+# Colour palette — restrained, finance-grade
+BLUE_DARK   = "#0A2540"
+BLUE_MID    = "#1A56A4"
+BLUE_LIGHT  = "#4A90D9"
+GREY_DARK   = "#4A4A4A"
+GREY_LIGHT  = "#E8EDF2"
+GREEN       = "#1A7F5A"
+RED         = "#C0392B"
+AMBER       = "#D4860A"
+WHITE       = "#FFFFFF"
+ACCENT      = "#2EAADC"
+
+
+def style():
+    """Apply a clean, professional style to every chart."""
+    plt.rcParams.update({
+        "figure.facecolor"  : WHITE,
+        "axes.facecolor"    : WHITE,
+        "axes.edgecolor"    : GREY_LIGHT,
+        "axes.spines.top"   : False,
+        "axes.spines.right" : False,
+        "axes.spines.left"  : True,
+        "axes.spines.bottom": True,
+        "axes.grid"         : True,
+        "axes.grid.axis"    : "y",
+        "grid.color"        : GREY_LIGHT,
+        "grid.linewidth"    : 0.8,
+        "font.family"       : "DejaVu Sans",
+        "text.color"        : GREY_DARK,
+        "axes.labelcolor"   : GREY_DARK,
+        "xtick.color"       : GREY_DARK,
+        "ytick.color"       : GREY_DARK,
+        "xtick.labelsize"   : 10,
+        "ytick.labelsize"   : 10,
+        "axes.titlesize"    : 13,
+        "axes.titleweight"  : "bold",
+        "axes.titlecolor"   : BLUE_DARK,
+        "axes.labelsize"    : 10,
+    })
@@ -0,0 +1,182 @@
+"""
+ASML Valuation Analysis — Yield Curve
+Replaces the single ^TNX point with a Nelson-Siegel curve fitted to the
+tenors stored in data/yield_curve.csv, so each projection year can be
+discounted at its own rate.
+
+With the decay parameter fixed, Nelson-Siegel is linear in its three
+factors, so every stored date is fitted in one batched least-squares solve
+(dates with missing tenors are handled through per-date weights; a date
+needs at least three quoted tenors to pin down the three factors).
+``discount_factors`` evaluates thousands of curve dates at once for
+backtests.
+
+The DCF rates keep the model's WACC at the 10-year point and take their
+shape from the curve: rate(t) = WACC + y(t) − y(10). They are opt-in:
+the report, charts and Sobol stages discount at the flat WACC, as the
+workbook does, and only ``valuation.value(m, rates=...)`` callers (such as
+``--show``) use the curve.
+
+Usage:
+    cd notebooks
+    python curve.py                     # fetch / extend the tenor history
+    python curve.py --show              # fit the latest curve, value ASML on it
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import fx
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE       = os.path.dirname(os.path.abspath(__file__))
+CURVE_PATH = os.path.join(HERE, "..", "data", "yield_curve.csv")
+
+# Yahoo Finance Treasury yield indices (quoted in percent) and their tenors
+TENORS = {"^IRX": 0.25, "^FVX": 5.0, "^TNX": 10.0, "^TYX": 30.0}
+TAU     = 1.37        # Nelson-Siegel decay in years (Diebold-Li λ = 0.0609/month)
+ANCHOR  = 10.0        # tenor at which the curve matches the model's WACC / rf
+MIN_TENORS = 3        # one per Nelson-Siegel factor
+HISTORY = "10y"
+
+# ─────────────────────────────────────────────
+# 1.  NELSON-SIEGEL
+# ─────────────────────────────────────────────
+
+def loadings(tenors, tau=TAU):
+    """(tenors, 3) factor loadings: level, slope, curvature."""
+    t = np.asarray(tenors, dtype=float)
+    x = t / tau
+    slope = (1 - np.exp(-x)) / x
+    return np.stack([np.ones_like(t), slope, slope - np.exp(-x)], axis=-1)
+
+
+def fit(yields, tenors, tau=TAU):
+    """Fit every row of ``yields`` (dates, tenors) in one batched solve.
+
+    NaN observations get zero weight; returns (dates, 3) factor betas, NaN
+    for a date with fewer than ``MIN_TENORS`` observed tenors.
+    """
+    y = np.asarray(yields, dtype=float)
+    X = loadings(tenors, tau)
+    w = np.isfinite(y).astype(float)
+    y = np.nan_to_num(y)
+    xtwx = np.einsum("ti,dt,tj->dij", X, w, X)
+    xtwy = np.einsum("ti,dt,dt->di", X, w, y)
+    # Under-observed dates get a dummy system so the batch solve still runs.
+    thin = w.sum(axis=-1) < MIN_TENORS
+    xtwx[thin] = np.eye(3)
+    params = np.linalg.solve(xtwx, xtwy[..., None])[..., 0]
+    params[thin] = np.nan
+    return params
+
+
+def yields_at(params, tenors, tau=TAU):
+    """Fitted yields for (dates, 3) params at any tenors → (dates, tenors)."""
+    return np.asarray(params) @ loadings(tenors, tau).T
+
+# ─────────────────────────────────────────────
+# 2.  CURVE STORE
+# ─────────────────────────────────────────────
+
+class YieldCurve:
+    """Fitted curves for every stored date, with cached discount factors."""
+
+    def __init__(self, dates, params, tau=TAU):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.params = np.asarray(params, dtype=float)
+        self.tau = tau
+
+    @classmethod
+    def load(cls, path=CURVE_PATH, tau=TAU):
+        df = pd.read_csv(path, parse_dates=["Date"]).sort_values("Date")
+        cols = [c for c in df.columns if c != "Date"]
+        # dates with too few quotes resolve as-of to the previous curve
+        df = df.dropna(thresh=MIN_TENORS, subset=cols)
+        tenors = [float(c) for c in cols]
+        params = fit(df[cols].to_numpy(dtype=float) / 100, tenors, tau)
+        return cls(fx._as_days(df["Date"]), params, tau)
+
+    def index(self, dates):
+        """As-of row for each date (latest curve on or before it)."""
+        pos = np.searchsorted(self.dates, fx._as_days(dates), side="right") - 1
+        if np.any(pos < 0):
+            raise KeyError("Date precedes the first stored curve")
+        return pos
+
+    def yields(self, dates, tenors):
+        """Fitted yields, (dates, tenors)."""
+        return yields_at(self.params[self.index(dates)], tenors, self.tau)
+
+    def discount_factors(self, dates, tenors):
+        """Annually-compounded discount factors for many curve dates, (dates, tenors)."""
+        t = np.asarray(tenors, dtype=float)
+        return (1 + self.yields(dates, t)) ** -t
+
+
+def load(path=CURVE_PATH):
+    """The fitted curve store, or None before ``python curve.py`` has been run."""
+    return YieldCurve.load(path) if os.path.exists(path) else None
+
+
+def wacc_curve(curve, dates, wacc, horizon, anchor=ANCHOR):
+    """Per-year discount rates shaped by the curve, pinned to WACC at ``anchor``.
+
+    ``dates`` may be one date or many; ``wacc`` broadcasts against them.
+    Returns (dates, horizon) rates, or (horizon,) for a single date.
+    """
+    years = np.arange(1, horizon + 1, dtype=float)
+    y = curve.yields(dates, np.append(years, anchor))
+    rates = np.asarray(wacc, dtype=float)[..., None] + y[:, :-1] - y[:, -1:]
+    return rates[0] if np.ndim(dates) == 0 else rates
+
+# ─────────────────────────────────────────────
+# 3.  UPDATE FROM YAHOO FINANCE
+# ─────────────────────────────────────────────
+
+def update(path=CURVE_PATH, period=HISTORY):
+    """Fetch daily closes for each tenor and merge them into the store."""
+    import yfinance as yf
+
+    cols = {}
+    for ticker, tenor in TENORS.items():
+        hist = yf.Ticker(ticker).history(period=period)["Close"]
+        if hist.empty:
+            print(f"   Warning: no yields returned for {ticker}")
+            continue
+        hist.index = pd.DatetimeIndex(fx._as_days(hist.index))
+        cols[f"{tenor:g}"] = hist.groupby(level=0).last()
+    new = pd.DataFrame(cols)
+    new.index.name = "Date"
+
+    if os.path.exists(path):
+        old = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+        new = new.combine_first(old)
+    new.sort_index().to_csv(path)
+    return new
+
+
+if __name__ == "__main__":
+    if "--show" in sys.argv:
+        import valuation
+
+        curve = load()
+        if curve is None:
+            sys.exit("No data/yield_curve.csv yet — run `python curve.py` first.")
+        m = valuation.load_model()
+        date = curve.dates[-1]
+        rates = wacc_curve(curve, date, m["wacc"], len(m["years"]))
+        flat, term = valuation.value(m), valuation.value(m, rates=rates)
+        print(f"\nCurve date {date}: " + ", ".join(
+            f"{t:g}y {y:.2%}" for t, y in zip((1, 2, 5, 10, 30), curve.yields(date, [1, 2, 5, 10, 30])[0])))
+        print(f"Flat WACC:       €{flat['per_share']:,.0f} per share")
+        print(f"Term structure:  €{term['per_share']:,.0f} per share")
+    else:
+        df = update()
+        print(f"Yield curve saved: {len(df)} days, tenors {', '.join(df.columns)}")
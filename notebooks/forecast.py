@@ -0,0 +1,261 @@
+"""
+ASML Valuation Analysis — Forecast Engine
+Generalises the Projections tab. The workbook hard-codes three growth
+phases, constant margins, annual periods and year-end discounting. Here a
+forecast is a *spec* of dense arrays:
+
+    phase_ends, phase_growth   (..., P)  annual growth until each phase end
+                                         (years from the base year); the last
+                                         phase continues to the horizon. An end
+                                         inside a year only resolves on the
+                                         quarterly grid
+    start, terminal            (..., D)  each driver's first-period level and
+                                         the level it fades to
+    fade_years, fade_power     (..., D)  fade length and shape:
+                                         w = (1 − t / fade_years) ** power,
+                                         1 = linear, > 1 converges early
+    base_revenue, wacc, terminal_growth, cash, debt, shares, price, mid_year
+
+D runs over DRIVERS (gross margin, R&D, SG&A, tax, CapEx, D&A, NWC as
+shares of revenue). Every array broadcasts over a leading batch shape, so
+thousands of specs with different phase counts (padded by ``pad_phases``)
+evaluate in one call. Periods are annual or quarterly: each year's
+revenue follows the annual growth path and is split across its quarters
+along the within-year compounding, so the quarters add up to the annual
+figure. NWC is held on annualised revenue, and the terminal value
+capitalises the final year's FCF. With ``mid_year = 1`` each period's FCF
+is discounted from its midpoint and the terminal value half a year
+earlier, as its perpetuity flows arrive through each year.
+
+``from_model`` turns a ``valuation.load_model`` dict into a spec that
+reproduces ``valuation.value`` exactly (annual, year-end).
+
+Usage:
+    cd notebooks
+    python forecast.py                  # workbook case, quarterly / mid-year variants, batch timing
+"""
+
+import time
+import numpy as np
+
+import valuation
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+DRIVERS = ("gross_margin", "rd_pct", "sga_pct", "tax_rate", "capex_pct", "da_pct", "nwc_pct")
+PERIODS = {"annual": 1, "quarterly": 4}
+HORIZON = valuation.HORIZON          # years
+SCALARS = ("base_revenue", "wacc", "terminal_growth", "cash", "debt",
+           "shares", "price", "mid_year")
+
+# ─────────────────────────────────────────────
+# 1.  SPECS
+# ─────────────────────────────────────────────
+
+def pad_phases(phases):
+    """Dense (n, P) ends / growth from a list of [(end_year, growth), ...].
+
+    Shorter lists are padded with an endless copy of their last phase, so
+    every spec shares one P.
+    """
+    p = max(len(x) for x in phases)
+    ends = np.full((len(phases), p), np.inf)
+    growth = np.empty((len(phases), p))
+    for i, x in enumerate(phases):
+        e, g = zip(*x)
+        ends[i, :len(e)] = e
+        growth[i, :len(g)] = g
+        growth[i, len(g):] = g[-1]
+    return ends, growth
+
+
+def from_model(m):
+    """Spec reproducing a ``valuation.load_model`` dict.
+
+    The per-year growth path becomes one phase per run of equal rates; each
+    driver fades linearly from its first to its last projection-year value,
+    which is exact while the workbook's margin rows are constant or linear.
+    """
+    growth = np.asarray(m["growth"], dtype=float)
+    change = np.flatnonzero(np.diff(growth)) + 1
+    ends = np.r_[change, len(growth)].astype(float)
+    vec = {k: np.broadcast_to(np.asarray(m[k], dtype=float), growth.shape) for k in DRIVERS}
+    spec = {
+        "phase_ends":   ends,
+        "phase_growth": growth[ends.astype(int) - 1],
+        "start":        np.array([vec[k][0] for k in DRIVERS]),
+        "terminal":     np.array([vec[k][-1] for k in DRIVERS]),
+        "fade_years":   np.full(len(DRIVERS), float(len(growth) - 1)),
+        "fade_power":   np.ones(len(DRIVERS)),
+        "mid_year":     0.0,
+    }
+    spec.update({k: float(m[k]) for k in SCALARS if k in m})
+    return spec
+
+
+def stack_specs(specs):
+    """Stack specs along a new leading axis (phase counts padded as needed)."""
+    ends, growth = pad_phases([list(zip(s["phase_ends"], s["phase_growth"])) for s in specs])
+    out = {k: np.stack([np.asarray(s[k], dtype=float) for s in specs])
+           for k in specs[0] if k not in ("phase_ends", "phase_growth")}
+    out.update(phase_ends=ends, phase_growth=growth)
+    return out
+
+# ─────────────────────────────────────────────
+# 2.  PATHS
+# ─────────────────────────────────────────────
+
+def period_times(horizon=HORIZON, periods="annual"):
+    """Period end times in years: (n,) with n = horizon × periods per year."""
+    q = PERIODS[periods]
+    return np.arange(1, horizon * q + 1) / q
+
+
+def growth_path(phase_ends, phase_growth, t):
+    """Annual growth in force in each period ending at ``t`` → (..., n)."""
+    ends = np.asarray(phase_ends, dtype=float)
+    growth = np.asarray(phase_growth, dtype=float)
+    # a period belongs to the first phase that ends at or after it
+    k = np.sum(ends[..., None, :] < t[:, None] - 1e-9, axis=-1)
+    k = np.minimum(k, ends.shape[-1] - 1)
+    return np.take_along_axis(np.broadcast_to(growth, k.shape[:-1] + growth.shape[-1:]), k, axis=-1)
+
+
+def fade_path(start, terminal, fade_years, fade_power, t0):
+    """Driver levels (..., D, n) fading from ``start`` to ``terminal``.
+
+    ``t0`` is each period's start time in years (0 for the first period);
+    a zero fade length means the terminal level from the first period.
+    """
+    years = np.asarray(fade_years, dtype=float)[..., None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = np.where(years > 0, 1 - t0 / years, 0.0)
+    w = np.clip(x, 0, 1) ** np.asarray(fade_power, dtype=float)[..., None]
+    start = np.asarray(start, dtype=float)[..., None]
+    terminal = np.asarray(terminal, dtype=float)[..., None]
+    return terminal + (start - terminal) * w
+
+
+def paths(spec, horizon=HORIZON, periods="annual"):
+    """Per-period growth (already de-annualised) and driver paths."""
+    q = PERIODS[periods]
+    t = period_times(horizon, periods)
+    g = growth_path(spec["phase_ends"], spec["phase_growth"], t)
+    levels = fade_path(spec["start"], spec["terminal"], spec["fade_years"],
+                       spec["fade_power"], t - 1 / q)
+    out = {k: levels[..., i, :] for i, k in enumerate(DRIVERS)}
+    out["growth"] = (1 + g) ** (1 / q) - 1
+    out["t"] = t
+    return out
+
+# ─────────────────────────────────────────────
+# 3.  PROJECTION & DISCOUNTING
+# ─────────────────────────────────────────────
+
+def project(spec, horizon=HORIZON, periods="annual"):
+    """Revenue-to-FCF build per period, as ``valuation.project`` per year.
+
+    Each year's revenue compounds from the base at that year's growth, and
+    the quarters split it in proportion to the compounded period growth
+    within the year, so quarterly revenue sums to the annual path. The
+    NWC balance is a share of annualised revenue and its first change is
+    the full balance, as in Projections!B41.
+    """
+    q = PERIODS[periods]
+    p = paths(spec, horizon, periods)
+    steps = 1 + p["growth"]
+    within = np.cumprod(steps.reshape(steps.shape[:-1] + (horizon, q)), axis=-1)
+    annual = (np.asarray(spec["base_revenue"], dtype=float)[..., None]
+              * np.cumprod(within[..., -1], axis=-1))
+    share = within / within.sum(axis=-1, keepdims=True)
+    revenue = (annual[..., None] * share).reshape(steps.shape)
+    ebit    = revenue * (p["gross_margin"] - p["rd_pct"] - p["sga_pct"])
+    nopat   = ebit * (1 - p["tax_rate"])
+    nwc     = revenue * q * p["nwc_pct"]
+    d_nwc   = np.diff(nwc, axis=-1, prepend=0.0)
+    fcf     = nopat + revenue * (p["da_pct"] - p["capex_pct"]) - d_nwc
+    return {"t": p["t"], "revenue": revenue, "ebit": ebit, "nopat": nopat, "fcf": fcf}
+
+
+def discount(fcf, t, wacc, terminal_growth, mid_year=0.0, periods="annual"):
+    """PV of per-period FCFs and a Gordon terminal value on the final year.
+
+    ``t`` holds period end times in years; with ``mid_year`` each flow is
+    discounted from the middle of its period and the terminal value from
+    half a year before the horizon.
+    """
+    q = PERIODS[periods]
+    fcf = np.asarray(fcf, dtype=float)
+    wacc = np.asarray(wacc, dtype=float)[..., None]
+    g = np.asarray(terminal_growth, dtype=float)[..., None]
+    mid = np.asarray(mid_year, dtype=float)[..., None]
+    df = (1 + wacc) ** -(t - mid * 0.5 / q)
+    pv = fcf * df
+    final_year = fcf[..., -q:].sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tv = final_year * (1 + g) / (wacc - g)
+    pv_tv = (tv * (1 + wacc) ** -(t[-1] - mid * 0.5))[..., 0]
+    pv_fcfs = pv.sum(axis=-1)
+    return {"discount_factors": df, "pv_fcf": pv, "pv_fcfs": pv_fcfs,
+            "terminal_value": tv[..., 0], "pv_tv": pv_tv, "ev": pv_fcfs + pv_tv}
+
+
+def by_year(a, periods="annual"):
+    """Sum per-period flows (..., n) into years (..., n / periods per year)."""
+    q = PERIODS[periods]
+    a = np.asarray(a, dtype=float)
+    return a.reshape(a.shape[:-1] + (-1, q)).sum(axis=-1)
+
+
+def value(spec, horizon=HORIZON, periods="annual", **overrides):
+    """Full DCF for a (possibly stacked) spec; any spec array may be overridden.
+
+    Returns the same keys as ``valuation.value``, with per-period arrays on
+    the last axis.
+    """
+    s = {**spec, **overrides}
+    proj = project(s, horizon, periods)
+    out = {**proj, **discount(proj["fcf"], proj["t"], s["wacc"], s["terminal_growth"],
+                              s.get("mid_year", 0.0), periods)}
+    out["equity"] = out["ev"] + np.asarray(s["cash"]) - np.asarray(s["debt"])
+    out["per_share"] = out["equity"] / np.asarray(s["shares"])
+    out["upside"] = out["per_share"] / np.asarray(s["price"]) - 1
+    return out
+
+
+if __name__ == "__main__":
+    m = valuation.load_model()
+    spec = from_model(m)
+    base = valuation.value(m)["per_share"]
+    print(f"\nWorkbook (annual, year-end):   €{value(spec)['per_share']:,.1f}  "
+          f"(valuation.py €{base:,.1f})")
+    print(f"Annual, mid-year:              €{value(spec, mid_year=1.0)['per_share']:,.1f}")
+    print(f"Quarterly, year-end:           €{value(spec, periods='quarterly')['per_share']:,.1f}")
+    print(f"Quarterly, mid-period:         €{value(spec, periods='quarterly', mid_year=1.0)['per_share']:,.1f}")
+
+    # A batch of random specs: 1–5 growth phases, margins fading to terminal levels
+    rng = np.random.default_rng(0)
+    n = 10_000
+    phases = [sorted(zip(np.sort(rng.choice(np.arange(1, HORIZON + 1), k, replace=False)),
+                         rng.uniform(0.0, 0.2, k)))
+              for k in rng.integers(1, 6, n)]
+    ends, growth = pad_phases(phases)
+    batch = {**{k: np.full(n, v) for k, v in spec.items() if np.ndim(v) == 0},
+             "phase_ends": ends, "phase_growth": growth,
+             "start": spec["start"] + rng.normal(0, 0.01, (n, len(DRIVERS))),
+             "terminal": spec["terminal"] * rng.uniform(0.8, 1.0, (n, len(DRIVERS))),
+             "fade_years": rng.uniform(3, 10, (n, len(DRIVERS))),
+             "fade_power": rng.uniform(0.5, 2.0, (n, len(DRIVERS))),
+             "mid_year": rng.integers(0, 2, n).astype(float)}
+    t0 = time.perf_counter()
+    r = value(batch, periods="quarterly")
+    secs = time.perf_counter() - t0
+    # quarterly revenue must add up to the annual path, year by year
+    gap = np.abs(by_year(r["revenue"], "quarterly") / value(batch)["revenue"] - 1).max()
+    print(f"\n  {'✓' if gap < 1e-9 else '✗'}  quarterly revenue sums to the annual path "
+          f"(max gap {gap:.1e})")
+    print(f"  ·  {n:,} quarterly specs ({ends.shape[1]} phase slots) in {secs * 1000:.0f} ms — "
+          f"median €{np.median(r['per_share']):,.0f}, "
+          f"5–95% €{np.percentile(r['per_share'], 5):,.0f}–€{np.percentile(r['per_share'], 95):,.0f}")
@@ -0,0 +1,189 @@
+"""
+ASML Valuation Analysis — FX Rates
+Keeps a daily exchange-rate history in data/fx_rates.csv and converts whole
+arrays / columns between currencies with date-aligned, vectorised lookups.
+
+Every rate is stored as USD per one unit of the currency; any cross rate is
+the ratio of two columns and is cached the first time it is asked for.
+Lookups are "as of": a date uses the latest rate on or before it, so
+weekend and holiday dates in price series resolve to the previous fixing.
+
+Monetary pandas objects carry their currency in ``obj.attrs["currency"]``
+(``tag`` / ``currency_of``); ``convert_series`` reads the tag and returns a
+re-tagged copy, so a value is never converted twice or compared across
+currencies by accident.
+
+Usage:
+    cd notebooks
+    python fx.py                       # fetch / extend the rate history
+    python fx.py EUR USD 2026-02-06    # look up one rate
+"""
+
+import os
+import re
+import sys
+import numpy as np
+import pandas as pd
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE      = os.path.dirname(os.path.abspath(__file__))
+FX_PATH   = os.path.join(HERE, "..", "data", "fx_rates.csv")
+BASE      = "USD"
+CURRENCIES = ("EUR", "GBP", "CHF", "JPY", "KRW", "TWD", "CNY")
+HISTORY   = "10y"
+
+# Column-header conventions used in data/*.csv, e.g. "Market Cap ($B)"
+_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY"}
+_LABEL_RE = re.compile(r"\((?P<sym>[$€£¥]|[A-Z]{3})\s*[BMK]?\)")
+
+# ─────────────────────────────────────────────
+# 1.  CURRENCY TAGS
+# ─────────────────────────────────────────────
+
+def tag(obj, currency):
+    """Record the currency of a Series (or of every column of a DataFrame)."""
+    obj.attrs["currency"] = currency
+    return obj
+
+
+def currency_of(obj, default=None):
+    return getattr(obj, "attrs", {}).get("currency", default)
+
+
+def infer_currency(label, default=None):
+    """Currency from a column header such as 'Market Cap ($B)' or 'Price (EUR)'."""
+    m = _LABEL_RE.search(str(label))
+    if not m:
+        return default
+    sym = m.group("sym")
+    return _SYMBOLS.get(sym, sym)
+
+
+def _as_days(dates):
+    """Any date-like scalar/array → datetime64[D], keeping local calendar dates."""
+    if isinstance(dates, np.ndarray) and np.issubdtype(dates.dtype, np.datetime64):
+        return dates.astype("datetime64[D]")
+    if isinstance(dates, (pd.Index, pd.Series)):
+        idx = pd.DatetimeIndex(dates)
+    else:
+        idx = pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(dates)))
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    return idx.values.astype("datetime64[D]")
+
+# ─────────────────────────────────────────────
+# 2.  RATE STORE
+# ─────────────────────────────────────────────
+
+class FXRates:
+    """Daily USD-per-unit rates for a set of currencies."""
+
+    def __init__(self, dates, usd_per_unit):
+        order = np.argsort(dates)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")[order]
+        self._usd = {c: np.asarray(v, dtype=float)[order] for c, v in usd_per_unit.items()}
+        self._usd[BASE] = np.ones(len(self.dates))
+        self._cross = {}
+
+    @classmethod
+    def load(cls, path=FX_PATH):
+        df = pd.read_csv(path, parse_dates=["Date"]).sort_values("Date").ffill()
+        return cls(_as_days(df["Date"]), {c: df[c].to_numpy() for c in df.columns if c != "Date"})
+
+    @property
+    def currencies(self):
+        return sorted(self._usd)
+
+    def cross(self, base, quote):
+        """Units of ``quote`` per one ``base`` on every stored date (cached)."""
+        key = (base, quote)
+        if key not in self._cross:
+            for c in key:
+                if c not in self._usd:
+                    raise KeyError(f"No FX history for {c}")
+            self._cross[key] = self._usd[base] / self._usd[quote]
+        return self._cross[key]
+
+    def _locate(self, dates):
+        pos = np.searchsorted(self.dates, _as_days(dates), side="right") - 1
+        return pos, pos < 0
+
+    def rate(self, base, quote, dates=None):
+        """As-of rate(s) for ``dates`` (latest rate when omitted)."""
+        if base == quote:
+            return 1.0 if dates is None else np.ones(np.shape(np.atleast_1d(dates)))
+        series = self.cross(base, quote)
+        if dates is None:
+            return float(series[-1])
+        pos, early = self._locate(dates)
+        out = series[np.clip(pos, 0, None)]
+        out[early] = np.nan
+        return out
+
+    def convert(self, values, base, quote, dates=None):
+        """Convert an array of ``base`` amounts, aligned element-wise to ``dates``."""
+        return np.asarray(values, dtype=float) * self.rate(base, quote, dates)
+
+    def convert_series(self, s, quote, dates=None, base=None):
+        """Convert a tagged Series; dates default to its DatetimeIndex."""
+        base = base or currency_of(s)
+        if base is None:
+            raise ValueError(f"Series '{s.name}' has no currency tag")
+        if dates is None and isinstance(s.index, pd.DatetimeIndex):
+            dates = s.index
+        out = pd.Series(self.convert(s.to_numpy(), base, quote, dates), index=s.index, name=s.name)
+        return tag(out, quote)
+
+
+def load(path=FX_PATH):
+    """The local rate store, or None before ``python fx.py`` has been run."""
+    return FXRates.load(path) if os.path.exists(path) else None
+
+# ─────────────────────────────────────────────
+# 3.  UPDATE FROM YAHOO FINANCE
+# ─────────────────────────────────────────────
+
+def update(path=FX_PATH, currencies=CURRENCIES, period=HISTORY):
+    """Fetch daily closes for each currency and merge them into the store."""
+    import yfinance as yf
+
+    cols = {}
+    for c in currencies:
+        hist = yf.Ticker(f"{c}{BASE}=X").history(period=period)["Close"]
+        if hist.empty:
+            print(f"   Warning: no rates returned for {c}{BASE}")
+            continue
+        hist.index = pd.DatetimeIndex(_as_days(hist.index))
+        cols[c] = hist.groupby(level=0).last()
+    new = pd.DataFrame(cols)
+    new.index.name = "Date"
+
+    if os.path.exists(path):
+        old = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+        new = new.combine_first(old)
+    new.sort_index().to_csv(path)
+    return new
+
+
+def load_or_fetch(path=FX_PATH):
+    """The local rate store, fetching it from Yahoo Finance on first use."""
+    if not os.path.exists(path):
+        print("   No data/fx_rates.csv yet — fetching FX history …")
+        update(path)
+    return FXRates.load(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3:
+        fx = load()
+        if fx is None:
+            sys.exit("No data/fx_rates.csv yet — run `python fx.py` first.")
+        date = sys.argv[3] if len(sys.argv) > 3 else None
+        r = fx.rate(sys.argv[1], sys.argv[2], date)
+        print(f"1 {sys.argv[1]} = {float(np.atleast_1d(r)[0]):.6f} {sys.argv[2]}")
+    else:
+        df = update()
+        print(f"FX rates saved: {len(df)} days, {', '.join(df.columns)}")
@@ -1,7 +1,8 @@
 """
 ASML Valuation Analysis — Chart Generator
 Reads all data directly from ASML_DCF_Model.xlsx and produces
-five publication-quality charts for the GitHub README.
+seven publication-quality charts for the GitHub README. Chart 7 reads the
+Sobol indices saved by sobol.py (run it first, or via pipeline.py).
 
 Usage:
     cd notebooks
@@ -13,6 +14,8 @@ Output:
     ../outputs/charts/03_dcf_waterfall.png
     ../outputs/charts/04_peer_comparison.png
     ../outputs/charts/05_sensitivity_heatmap.png
+    ../outputs/charts/06_adaptive_sensitivity.png
+    ../outputs/charts/07_value_drivers.png
 """
 
 import os
@@ -25,6 +28,12 @@ import matplotlib.ticker as mticker
 import seaborn as sns
 import openpyxl
 
+import adaptive
+import sobol
+import valuation
+from chart_style import (BLUE_DARK, BLUE_MID, BLUE_LIGHT, GREY_DARK, GREY_LIGHT,
+                         GREEN, RED, AMBER, WHITE, ACCENT, style)
+
 # ─────────────────────────────────────────────
 # 0.  CONFIG
 # ─────────────────────────────────────────────
@@ -33,45 +42,6 @@ EXCEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mod
 OUT_DIR    = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "outputs", "charts")
 os.makedirs(OUT_DIR, exist_ok=True)
 
-# Colour palette — restrained, finance-grade
-BLUE_DARK   = "#0A2540"
-BLUE_MID    = "#1A56A4"
-BLUE_LIGHT  = "#4A90D9"
-GREY_DARK   = "#4A4A4A"
-GREY_LIGHT  = "#E8EDF2"
-GREEN       = "#1A7F5A"
-RED         = "#C0392B"
-AMBER       = "#D4860A"
-WHITE       = "#FFFFFF"
-ACCENT      = "#2EAADC"
-
-def style():
-    """Apply a clean, professional style to every chart."""
-    plt.rcParams.update({
-        "figure.facecolor"  : WHITE,
-        "axes.facecolor"    : WHITE,
-        "axes.edgecolor"    : GREY_LIGHT,
-        "axes.spines.top"   : False,
-        "axes.spines.right" : False,
-        "axes.spines.left"  : True,
-        "axes.spines.bottom": True,
-        "axes.grid"         : True,
-        "axes.grid.axis"    : "y",
-        "grid.color"        : GREY_LIGHT,
-        "grid.linewidth"    : 0.8,
-        "font.family"       : "DejaVu Sans",
-        "text.color"        : GREY_DARK,
-        "axes.labelcolor"   : GREY_DARK,
-        "xtick.color"       : GREY_DARK,
-        "ytick.color"       : GREY_DARK,
-        "xtick.labelsize"   : 10,
-        "ytick.labelsize"   : 10,
-        "axes.titlesize"    : 13,
-        "axes.titleweight"  : "bold",
-        "axes.titlecolor"   : BLUE_DARK,
-        "axes.labelsize"    : 10,
-    })
-
 style()
 
 def savefig(name):
@@ -125,12 +95,12 @@ print(f"  Gross margin:      {[round(v,1) for v in gm_pct]}")
 
 # ── Projections ──
 ws_proj = wb["Projections"]
-YEARS_PROJ = [2026, 2027, 2028, 2029, 2030, 2031, 2032, 2033, 2034, 2035]
+YEARS_PROJ = list(range(valuation.BASE_YEAR + 1, valuation.BASE_YEAR + 1 + valuation.HORIZON))
 
 r_pj_rev  = find_row(ws_proj, "Revenue")
 r_pj_fcf  = find_row(ws_proj, "Unlevered Free Cash Flow (FCF)")
 
-def read_proj_row(ws, row, ncols=10, start_col=2):
+def read_proj_row(ws, row, ncols=valuation.HORIZON, start_col=2):
     return [ws.cell(row, start_col + i).value or 0 for i in range(ncols)]
 
 rev_proj  = read_proj_row(ws_proj, r_pj_rev)
@@ -439,12 +409,113 @@ ax.text(0.01, -0.13,
 plt.tight_layout()
 savefig("05_sensitivity_heatmap.png")
 
+# ─────────────────────────────────────────────
+# CHART 6 — Adaptive Sensitivity & Break-even Contour
+# ─────────────────────────────────────────────
+
+print("Building Chart 6: Adaptive Sensitivity …")
+
+model = valuation.load_model()
+grid  = adaptive.refine(model, price=curr_price)
+a_waccs, a_growths, a_values = grid.to_dense()
+print(f"  {grid.n_evals} valuations vs. {grid.dense_evals} for the dense grid")
+
+fig, ax = plt.subplots(figsize=(13, 6))
+ax.grid(False)
+
+# Same diverging palette as Chart 5, clipped so the WACC → g blow-up
+# does not wash out the rest of the map
+shown = np.ma.masked_invalid(np.where(a_values > 0, a_values, np.nan))
+vmax  = 2 * curr_price
+mesh = ax.pcolormesh(a_waccs * 100, a_growths * 100, np.clip(shown, 0, vmax),
+                     cmap=cmap, norm=matplotlib.colors.TwoSlopeNorm(curr_price, 0, vmax),
+                     shading="nearest")
+fig.colorbar(mesh, ax=ax, shrink=0.85, label="DCF Value Per Share (EUR)")
+
+# Quad-tree leaves: cell density shows where the sampler spent its effort
+w0, w1, g0, g1 = grid.bounds()
+for x0, x1, y0, y1 in zip(w0 * 100, w1 * 100, g0 * 100, g1 * 100):
+    ax.add_patch(plt.Rectangle((x0, y0), x1 - x0, y1 - y0, fill=False,
+                               edgecolor=WHITE, linewidth=0.3, alpha=0.6))
+
+cs = ax.contour(a_waccs * 100, a_growths * 100, shown, levels=[curr_price],
+                colors=BLUE_DARK, linewidths=2)
+ax.clabel(cs, fmt=lambda v: f"Break-even €{v:,.0f}", fontsize=8.5)
+
+base = (model["wacc"] * 100, model["terminal_growth"] * 100)
+ax.plot(*base, marker="o", color=BLUE_DARK, markersize=7)
+ax.annotate(f"Base case €{dcf_per_share:,.0f}", base,
+            xytext=(8, 8), textcoords="offset points", fontsize=9,
+            fontweight="bold", color=BLUE_DARK)
+
+ax.xaxis.set_major_formatter(mticker.FuncFormatter(lambda v, _: f"{v:.1f}%"))
+ax.yaxis.set_major_formatter(mticker.FuncFormatter(lambda v, _: f"{v:.1f}%"))
+ax.set_xlabel("WACC", fontsize=10, labelpad=8)
+ax.set_ylabel("Terminal Growth Rate", fontsize=10, labelpad=8)
+ax.set_title(
+    f"Adaptive Sensitivity — Where DCF Value Meets the €{curr_price:,.0f} Price\n"
+    f"{grid.n_evals:,} valuations, refined around the break-even contour and WACC → g "
+    f"({grid.n_evals / grid.dense_evals:.0%} of a dense {grid.n + 1}×{grid.n + 1} grid)",
+    fontsize=11, fontweight="bold", color=BLUE_DARK, pad=12
+)
+
+plt.tight_layout()
+savefig("06_adaptive_sensitivity.png")
+
+# ─────────────────────────────────────────────
+# CHART 7 — Value Drivers: Tornado & Sobol Indices
+# ─────────────────────────────────────────────
+
+print("Building Chart 7: Value Drivers …")
+
+torn  = sobol.tornado(model)
+sidx  = sobol.load_indices().loc[torn.index]     # written by the global_sensitivity stage
+
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6), sharey=True,
+                               gridspec_kw={"width_ratios": [3, 2]})
+y = np.arange(len(torn))[::-1]
+
+# Left: one-at-a-time swings around the base case
+for yi, (_, r) in zip(y, torn.iterrows()):
+    ax1.barh(yi, r["low"] - dcf_per_share, left=dcf_per_share, color=RED, height=0.6)
+    ax1.barh(yi, r["high"] - dcf_per_share, left=dcf_per_share, color=GREEN, height=0.6)
+ax1.axvline(dcf_per_share, color=BLUE_DARK, linewidth=1.2)
+ax1.set_yticks(y)
+ax1.set_yticklabels(torn["label"])
+ax1.xaxis.set_major_formatter(mticker.FuncFormatter(lambda v, _: f"€{v:,.0f}"))
+ax1.set_xlabel("DCF Value Per Share (EUR)")
+ax1.set_title(f"One at a Time — Low / High Around €{dcf_per_share:,.0f}", fontsize=11)
+ax1.grid(axis="x", color=GREY_LIGHT)
+ax1.grid(axis="y", visible=False)
+ax1.set_axisbelow(True)
+ax1.legend(handles=[mpatches.Patch(color=RED, label="Low end of range"),
+                    mpatches.Patch(color=GREEN, label="High end of range")],
+           fontsize=8.5, frameon=False, loc="lower right")
+
+# Right: share of output variance, alone (S1) and with interactions (ST)
+ax2.barh(y + 0.18, sidx["ST"], height=0.36, color=BLUE_LIGHT, label="Total (ST)")
+ax2.barh(y - 0.18, sidx["S1"], height=0.36, color=BLUE_DARK, label="First order (S1)")
+for yi, v in zip(y, sidx["ST"]):
+    ax2.text(v + 0.005, yi + 0.18, f"{v:.0%}", va="center", fontsize=8.5, color=GREY_DARK)
+ax2.xaxis.set_major_formatter(mticker.PercentFormatter(1.0, decimals=0))
+ax2.set_xlabel("Share of Value Variance")
+ax2.set_title("All at Once — Sobol Indices", fontsize=11)
+ax2.grid(axis="x", color=GREY_LIGHT)
+ax2.grid(axis="y", visible=False)
+ax2.set_axisbelow(True)
+ax2.legend(fontsize=8.5, frameon=False, loc="lower right")
+
+fig.suptitle("What Drives the DCF Value — Driver Ranges Applied Around the Workbook Base Case",
+             fontsize=13, fontweight="bold", color=BLUE_DARK, y=1.02)
+plt.tight_layout()
+savefig("07_value_drivers.png")
+
 # ─────────────────────────────────────────────
 # DONE
 # ─────────────────────────────────────────────
 
 print(f"\n{'='*55}")
-print("All 5 charts written to outputs/charts/")
+print("All 7 charts written to outputs/charts/")
 print(f"{'='*55}")
 print("""
   01_revenue_growth.png     — Historical & projected revenue
@@ -452,4 +523,6 @@ print("""
   03_dcf_waterfall.png      — Valuation bridge to equity value
   04_peer_comparison.png    — EV/EBITDA and P/E vs peers
   05_sensitivity_heatmap.png — WACC × Terminal Growth sensitivity
+  06_adaptive_sensitivity.png — Adaptive grid with break-even contour
+  07_value_drivers.png      — Tornado and Sobol indices for every DCF driver
 """)
@@ -0,0 +1,261 @@
+"""
+ASML Valuation Analysis — Fair-Multiple Regression
+Chart 4 compares ASML's multiples with the median of three peers. This
+module instead regresses EV/EBITDA and P/E on revenue growth, gross
+margin, operating margin and ROIC across a wider universe. Each company's
+residual is the part of its multiple that those fundamentals do not
+explain.
+
+Snapshots are appended to data/multiples_universe.csv (one row per
+ticker per refresh date), so the file is a (date × ticker) panel. Every
+date is fitted in one batched least-squares solve: the normal equations
+for all dates are built with einsum and solved together. ``FairMultiples``
+keeps each date's inverse Gram matrix, so when one company's row changes
+the fit is patched with two Sherman-Morrison rank-one updates instead of
+a full refit.
+
+Usage:
+    cd notebooks
+    python multiples.py                 # refresh today's snapshot, then fit
+    python multiples.py --fit-only      # fit the stored panel
+
+Output:
+    ../data/multiples_universe.csv
+    ../outputs/fair_multiples.csv
+"""
+
+import os
+import argparse
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+import fx
+import wacc
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE          = os.path.dirname(os.path.abspath(__file__))
+UNIVERSE_PATH = os.path.join(HERE, "..", "data", "multiples_universe.csv")
+OUT_PATH      = os.path.join(HERE, "..", "outputs", "fair_multiples.csv")
+
+# Semiconductor equipment, foundry, IDM and fabless names with Yahoo
+# coverage; ASML's three workbook peers come first.
+UNIVERSE = (
+    "ASML", "AMAT", "LRCX", "KLAC", "TER", "ENTG", "MKSI", "ONTO", "NVMI",
+    "ACLS", "AMKR", "COHU", "FORM", "KLIC", "UCTT", "ICHR", "ASYS", "CAMT",
+    "TSM", "INTC", "005930.KS", "UMC", "GFS", "MU", "TXN", "ADI", "NXPI",
+    "MCHP", "ON", "STM", "IFNNY", "NVDA", "AMD", "AVGO", "QCOM", "MRVL",
+    "MPWR", "LSCC", "SWKS", "QRVO", "SNPS", "CDNS", "ARM",
+)
+FEATURES = ("revenue_growth", "gross_margin", "operating_margin", "roic")
+TARGETS  = ("ev_ebitda", "pe")
+MAX_MULTIPLE = 200      # drop loss-making / near-zero-earnings outliers
+RIDGE        = 1e-8     # keeps dates with few companies invertible
+
+# ─────────────────────────────────────────────
+# 1.  PANEL
+# ─────────────────────────────────────────────
+
+def load_panel(path=UNIVERSE_PATH):
+    """(dates × tickers) arrays from the snapshot file.
+
+    Returns {"dates", "tickers", "X": (D, N, features), "Y": (D, N, targets)};
+    a missing snapshot is NaN.
+    """
+    df = pd.read_csv(path, parse_dates=["Date"])
+    df = df.drop_duplicates(["Date", "Ticker"], keep="last")
+    dates = np.sort(df["Date"].unique())
+    tickers = list(dict.fromkeys(df["Ticker"]))
+    full = (df.set_index(["Date", "Ticker"])
+              .reindex(pd.MultiIndex.from_product([dates, tickers])))
+    shape = (len(dates), len(tickers))
+    return {
+        "dates":   fx._as_days(pd.DatetimeIndex(dates)),
+        "tickers": tickers,
+        "X": np.stack([full[c].to_numpy(dtype=float).reshape(shape) for c in FEATURES], -1),
+        "Y": np.stack([full[c].to_numpy(dtype=float).reshape(shape) for c in TARGETS], -1),
+    }
+
+
+def design(X):
+    """Prepend the intercept column: (..., features) → (..., 1 + features)."""
+    return np.concatenate([np.ones(X.shape[:-1] + (1,)), X], axis=-1)
+
+
+def usable(X, Y):
+    """Rows with every feature and every multiple present and in range."""
+    with np.errstate(invalid="ignore"):
+        ok_y = np.all((Y > 0) & (Y < MAX_MULTIPLE), axis=-1)
+    return np.all(np.isfinite(X), axis=-1) & ok_y
+
+# ─────────────────────────────────────────────
+# 2.  BATCHED FIT WITH RANK-ONE UPDATES
+# ─────────────────────────────────────────────
+
+class FairMultiples:
+    """Per-date OLS of every target on the features, fitted in one batch.
+
+    ``coef`` is (dates, 1 + features, targets). ``update`` replaces one
+    company's row on one date and patches that date's inverse Gram matrix
+    with Sherman-Morrison rank-one updates, so a single refresh costs
+    O(p²) instead of a refit.
+    """
+
+    def __init__(self, dates, tickers, X, Y):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.tickers = list(tickers)
+        self._col = {t: i for i, t in enumerate(self.tickers)}
+        self.X, self.Y = np.array(X, dtype=float), np.array(Y, dtype=float)
+        self.fit()
+
+    @classmethod
+    def load(cls, path=UNIVERSE_PATH):
+        return cls(**load_panel(path))
+
+    def fit(self):
+        """(Re)build every date's normal equations and solve them together."""
+        self.mask = usable(self.X, self.Y)
+        w = self.mask.astype(float)
+        Z = design(np.nan_to_num(self.X))
+        Y = np.nan_to_num(self.Y)
+        p = Z.shape[-1]
+        self.gram = np.einsum("dni,dn,dnj->dij", Z, w, Z) + RIDGE * np.eye(p)
+        self.xty = np.einsum("dni,dn,dnk->dik", Z, w, Y)
+        self.inv = np.linalg.inv(self.gram)
+        self.coef = self.inv @ self.xty
+        return self
+
+    def _rank_one(self, d, z, y, sign):
+        """Add (sign = +1) or remove (−1) one observation on date ``d``."""
+        a = self.inv[d]
+        az = a @ z
+        self.inv[d] = a - sign * np.outer(az, az) / (1 + sign * z @ az)
+        self.gram[d] += sign * np.outer(z, z)
+        self.xty[d] += sign * np.outer(z, y)
+
+    def update(self, date, ticker, x, y):
+        """Replace ``ticker``'s features / multiples on ``date`` in place."""
+        d = int(np.searchsorted(self.dates, fx._as_days(date))[0])
+        if d == len(self.dates) or self.dates[d] != fx._as_days(date)[0]:
+            raise KeyError(f"No snapshot dated {date}")
+        n = self._col[ticker]
+        if self.mask[d, n]:
+            self._rank_one(d, design(self.X[d, n]), self.Y[d, n], -1)
+        self.X[d, n], self.Y[d, n] = x, y
+        self.mask[d, n] = usable(self.X[d, n], self.Y[d, n])
+        if self.mask[d, n]:
+            self._rank_one(d, design(self.X[d, n]), self.Y[d, n], +1)
+        self.coef[d] = self.inv[d] @ self.xty[d]
+
+    def fair(self):
+        """Fitted multiples, (dates, tickers, targets); NaN where unusable."""
+        out = np.einsum("dni,dik->dnk", design(self.X), self.coef)
+        return np.where(self.mask[..., None], out, np.nan)
+
+    def residuals(self):
+        """Actual minus fair multiple; positive = trades rich to fundamentals."""
+        return self.Y - self.fair()
+
+    def frame(self, date=None):
+        """Actual, fair and residual multiples as of one date (latest by default)."""
+        d = -1 if date is None else int(np.searchsorted(self.dates, fx._as_days(date), side="right")[0]) - 1
+        if date is not None and d < 0:
+            raise KeyError(f"{date} precedes the first snapshot")
+        fair, res = self.fair()[d], self.residuals()[d]
+        cols = {}
+        for k, t in enumerate(TARGETS):
+            cols[t] = self.Y[d, :, k]
+            cols[f"{t}_fair"] = fair[:, k]
+            cols[f"{t}_residual"] = res[:, k]
+        df = pd.DataFrame(cols, index=pd.Index(self.tickers, name="Ticker"))
+        df.attrs["date"] = str(self.dates[d])
+        df.attrs["n"] = int(self.mask[d].sum())
+        return df[self.mask[d]]
+
+    def r_squared(self):
+        """(dates, targets) in-sample R² of each date's fit."""
+        w = self.mask[..., None]
+        y = np.where(w, self.Y, np.nan)
+        ss_res = np.nansum(np.where(w, self.residuals(), np.nan) ** 2, axis=1)
+        ss_tot = np.nansum((y - np.nanmean(y, axis=1, keepdims=True)) ** 2, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 1 - ss_res / ss_tot
+
+# ─────────────────────────────────────────────
+# 3.  SNAPSHOT FROM YAHOO FINANCE
+# ─────────────────────────────────────────────
+
+def snapshot(ticker, info, rates=None):
+    """One universe row from a Yahoo ``info`` dict (None if unusable)."""
+    quote_ccy = info.get("currency", "USD")
+    report_ccy = info.get("financialCurrency", quote_ccy)
+    ev, ebitda = info.get("enterpriseValue"), info.get("ebitda")
+    if not ev or not ebitda:
+        return None
+    # As in 02_collect_peers.py: EV is in the listing currency, EBITDA in
+    # the reporting currency.
+    if quote_ccy != report_ccy:
+        if rates is None:
+            return None
+        ev = rates.convert(ev, quote_ccy, report_ccy)
+    revenue, op_margin = info.get("totalRevenue"), info.get("operatingMargins")
+    debt = info.get("totalDebt") or 0.0
+    book = (info.get("bookValue") or np.nan) * (info.get("sharesOutstanding") or np.nan)
+    roic = (op_margin * revenue * (1 - wacc.TAX_RATE) / (debt + book)
+            if revenue and op_margin is not None else np.nan)
+    return {
+        "Ticker":           ticker,
+        "ev_ebitda":        float(ev) / ebitda,
+        "pe":               info.get("trailingPE", np.nan),
+        "revenue_growth":   info.get("revenueGrowth", np.nan),
+        "gross_margin":     info.get("grossMargins", np.nan),
+        "operating_margin": op_margin if op_margin is not None else np.nan,
+        "roic":             roic,
+    }
+
+
+def update(tickers=UNIVERSE, path=UNIVERSE_PATH):
+    """Append today's snapshot for every ticker to the universe file."""
+    import yfinance as yf
+
+    rates = fx.load()
+    rows = []
+    for t in tickers:
+        try:
+            row = snapshot(t, yf.Ticker(t).info, rates)
+        except Exception as e:          # delisted / renamed tickers
+            print(f"   Warning: {t} skipped ({e})")
+            continue
+        if row is not None:
+            rows.append(row)
+    new = pd.DataFrame(rows)
+    new.insert(0, "Date", pd.Timestamp(dt.date.today()))
+    if os.path.exists(path):
+        old = pd.read_csv(path, parse_dates=["Date"])
+        new = pd.concat([old, new]).drop_duplicates(["Date", "Ticker"], keep="last")
+    new.sort_values(["Date", "Ticker"]).to_csv(path, index=False)
+    return new
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--fit-only", action="store_true")
+    args = ap.parse_args()
+
+    if not args.fit_only:
+        df = update()
+        print(f"Universe snapshot saved: {df['Ticker'].nunique()} tickers, "
+              f"{df['Date'].nunique()} dates")
+
+    model = FairMultiples.load()
+    latest = model.frame()
+    r2 = model.r_squared()[-1]
+    print(f"\nFair multiples on {latest.attrs['date']} ({latest.attrs['n']} companies; "
+          + ", ".join(f"{t} R² {v:.2f}" for t, v in zip(TARGETS, r2)) + ")")
+    print(latest.sort_values("ev_ebitda_residual").round(1).to_string())
+    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    latest.to_csv(OUT_PATH)
+    print(f"  ✓  Saved {os.path.relpath(OUT_PATH, os.path.join(HERE, '..'))}")
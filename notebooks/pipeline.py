@@ -0,0 +1,360 @@
+"""
+ASML Valuation Analysis — Pipeline Runner
+Runs the project scripts as a stage DAG. Each stage declares the files it
+reads and writes; a stage is skipped when the content hashes of its inputs
+and outputs match the last successful run, and stages whose dependencies
+are satisfied run concurrently (e.g. peer collection and market data).
+Optional stages (the xlwings recalculation, which needs Excel) are reported
+as unavailable instead of failing their downstream stages. Volatile stages
+(the Yahoo Finance collectors) run every time, since their inputs are the
+live market; downstream stages re-run only if what they fetched changed.
+
+Usage:
+    cd notebooks
+    python pipeline.py                 # run everything that is stale
+    python pipeline.py charts          # run one stage (and stale upstream stages)
+    python pipeline.py --force         # ignore the hash cache
+    python pipeline.py --dry-run       # show what would run
+
+State:
+    ../outputs/.pipeline_state.json
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import importlib.util
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE       = os.path.dirname(os.path.abspath(__file__))
+ROOT       = os.path.normpath(os.path.join(HERE, ".."))
+STATE_PATH = os.path.join(ROOT, "outputs", ".pipeline_state.json")
+MAX_WORKERS = 4
+
+
+@dataclass
+class Stage:
+    """One pipeline step: a script in notebooks/ plus the files it touches.
+
+    Paths are relative to the repository root. The stage's own script is
+    always treated as an input, so editing its configuration re-runs it.
+    """
+    name: str
+    script: str
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    after: list = field(default_factory=list)   # explicit ordering, no file link
+    requires: list = field(default_factory=list)  # modules that must be importable
+    optional: bool = False      # a failure does not block downstream stages
+    volatile: bool = False      # fetches live data, so it is never up to date
+
+    @property
+    def all_inputs(self):
+        return [os.path.join("notebooks", self.script)] + list(self.inputs)
+
+
+CHARTS = [f"outputs/charts/{n}" for n in (
+    "01_revenue_growth.png",
+    "02_margin_analysis.png",
+    "03_dcf_waterfall.png",
+    "04_peer_comparison.png",
+    "05_sensitivity_heatmap.png",
+    "06_adaptive_sensitivity.png",
+    "07_value_drivers.png",
+)]
+
+STAGES = [
+    Stage("collect_asml", "01_collect_asml.py", volatile=True,
+          outputs=["data/asml_income_CLEAN.csv",
+                   "data/asml_balance_CLEAN.csv",
+                   "data/asml_cashflow_CLEAN.csv",
+                   "data/asml_metrics.csv"]),
+    Stage("fx_rates", "fx.py", volatile=True,
+          outputs=["data/fx_rates.csv"]),
+    Stage("yield_curve", "curve.py", volatile=True,
+          outputs=["data/yield_curve.csv"]),
+    Stage("intraday_bars", "bars.py", volatile=True,     # Yahoo keeps ~7 days of 1m bars
+          outputs=["data/bars/ASML/1m/ts.i8", "data/bars/SPY/1m/ts.i8"]),
+    Stage("collect_peers", "02_collect_peers.py", volatile=True,
+          inputs=["data/fx_rates.csv", "notebooks/fx.py"],
+          outputs=["data/comparables.csv"]),
+    Stage("fair_multiples", "multiples.py", volatile=True,
+          inputs=["data/fx_rates.csv", "notebooks/fx.py", "notebooks/wacc.py"],
+          outputs=["data/multiples_universe.csv", "outputs/fair_multiples.csv"]),
+    Stage("market_data", "03_market_data.py", volatile=True,
+          inputs=["data/asml_income.csv", "data/asml_balance.csv",
+                  "data/asml_prices.csv", "data/fx_rates.csv",
+                  "data/bars/ASML/1m/ts.i8", "data/bars/SPY/1m/ts.i8",
+                  "notebooks/wacc.py", "notebooks/fx.py", "notebooks/bars.py"],
+          outputs=["data/market_data.csv"]),
+    # The workbook is updated by hand from the collected CSVs; the sensitivity
+    # stage then recalculates it in place via xlwings. Without Excel it is
+    # skipped and the NumPy stages read the workbook as last saved.
+    Stage("sensitivity", "sensitivity_analysis_xlwings.py",
+          inputs=["models/ASML_DCF_Model.xlsx"],
+          outputs=["models/ASML_DCF_Model.xlsx"],
+          after=["collect_asml", "collect_peers", "market_data"],
+          requires=["xlwings"], optional=True),
+    Stage("charts", "generate_charts.py",
+          inputs=["models/ASML_DCF_Model.xlsx",
+                  "outputs/sobol_indices.csv",
+                  "notebooks/valuation.py",
+                  "notebooks/adaptive.py",
+                  "notebooks/sobol.py"],
+          outputs=CHARTS,
+          after=["global_sensitivity"]),
+    Stage("global_sensitivity", "sobol.py",
+          inputs=["models/ASML_DCF_Model.xlsx", "notebooks/valuation.py"],
+          outputs=["outputs/sobol_indices.csv"]),
+    Stage("workbooks", "workbooks.py",
+          inputs=["models/ASML_DCF_Model.xlsx",
+                  "data/market_data.csv",
+                  "data/fx_rates.csv",
+                  "notebooks/valuation.py",
+                  "notebooks/wacc.py",
+                  "notebooks/fx.py"],
+          outputs=["outputs/workbooks/manifest.csv"]),
+    Stage("report", "report.py",
+          inputs=["models/ASML_DCF_Model.xlsx",
+                  "data/market_data.csv",
+                  "data/asml_prices.csv",
+                  "data/fx_rates.csv",
+                  "notebooks/valuation.py",
+                  "notebooks/fx.py",
+                  "notebooks/templates/investment_memo.md",
+                  "notebooks/templates/readme_sections.md"],
+          outputs=["outputs/investment_memo.md", "README.md"]),
+]
+
+# ─────────────────────────────────────────────
+# 1.  CONTENT HASHING
+# ─────────────────────────────────────────────
+
+def file_hash(path, cache):
+    """SHA-256 of a file, memoised on (size, mtime) so no-op runs stay cheap."""
+    full = os.path.join(ROOT, path)
+    try:
+        st = os.stat(full)
+    except FileNotFoundError:
+        return None
+    key = f"{st.st_size}:{st.st_mtime_ns}"
+    hit = cache.get(path)
+    if hit and hit[0] == key:
+        return hit[1]
+    h = hashlib.sha256()
+    with open(full, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    cache[path] = (key, digest)
+    return digest
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {"files": {}, "stages": {}}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+def fingerprint(stage, cache):
+    """Hashes of everything a stage reads and writes."""
+    return {
+        "inputs":  {p: file_hash(p, cache) for p in stage.all_inputs},
+        "outputs": {p: file_hash(p, cache) for p in stage.outputs},
+    }
+
+
+def is_fresh(stage, state, cache):
+    prev = state["stages"].get(stage.name)
+    if prev is None or stage.volatile:
+        return False
+    now = fingerprint(stage, cache)
+    if any(h is None for h in now["outputs"].values()):
+        return False
+    return now == prev
+
+# ─────────────────────────────────────────────
+# 2.  DAG
+# ─────────────────────────────────────────────
+
+def build_graph(stages):
+    """Map each stage to the set of stages it depends on.
+
+    A stage depends on every other stage that writes one of its inputs,
+    plus anything listed in ``after``. Stages that rewrite their own input
+    in place (the workbook) do not depend on themselves.
+    """
+    producers = {}
+    for s in stages:
+        for p in s.outputs:
+            producers.setdefault(p, []).append(s.name)
+    deps = {}
+    for s in stages:
+        d = set(s.after)
+        for p in s.all_inputs:
+            d.update(n for n in producers.get(p, []) if n != s.name)
+        deps[s.name] = d
+    _check_acyclic(deps)
+    return deps
+
+
+def _check_acyclic(deps):
+    seen, stack = set(), set()
+
+    def visit(n):
+        if n in stack:
+            raise ValueError(f"Pipeline cycle through stage '{n}'")
+        if n in seen:
+            return
+        stack.add(n)
+        for d in deps[n]:
+            visit(d)
+        stack.discard(n)
+        seen.add(n)
+
+    for n in deps:
+        visit(n)
+
+
+def upstream(targets, deps):
+    """The requested stages plus everything they transitively depend on."""
+    keep, todo = set(), list(targets)
+    while todo:
+        n = todo.pop()
+        if n not in keep:
+            keep.add(n)
+            todo.extend(deps[n])
+    return keep
+
+# ─────────────────────────────────────────────
+# 3.  EXECUTION
+# ─────────────────────────────────────────────
+
+def run_script(stage):
+    """Run a stage's script from notebooks/, as the scripts expect."""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, stage.script],
+        cwd=HERE, capture_output=True, text=True,
+    )
+    return proc, time.perf_counter() - t0
+
+
+def run(targets=None, force=False, dry_run=False, stages=None, workers=MAX_WORKERS):
+    """Run stale stages in dependency order; returns {stage: status}."""
+    stages = {s.name: s for s in (stages or STAGES)}
+    deps = build_graph(list(stages.values()))
+    unknown = set(targets or []) - set(stages)
+    if unknown:
+        raise KeyError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    selected = upstream(targets, deps) if targets else set(stages)
+
+    state = load_state()
+    cache = {p: tuple(v) for p, v in state.get("files", {}).items()}
+    status = {}
+    changed = set()             # stages that ran and rewrote an output
+    pending = {n: deps[n] & selected for n in selected}
+    running = {}
+
+    def launch(pool, name):
+        stage = stages[name]
+        upstream_ran = any(d in changed for d in deps[name])
+        if not force and not upstream_ran and is_fresh(stage, state, cache):
+            status[name] = "skipped"
+            print(f"  ·  {name:<18} up to date")
+            return
+        missing = [m for m in stage.requires if importlib.util.find_spec(m) is None]
+        if missing and stage.optional:
+            status[name] = "unavailable"
+            print(f"  ·  {name:<18} skipped — {', '.join(missing)} not installed")
+            return
+        if dry_run:
+            status[name] = "ran"
+            changed.add(name)
+            print(f"  →  {name:<18} would run")
+            return
+        print(f"  →  {name:<18} running {stage.script} …")
+        running[pool.submit(run_script, stage)] = name
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            ready = [n for n, d in pending.items() if d <= set(status)]
+            for n in sorted(ready):
+                del pending[n]
+                if any(status.get(d) == "failed" for d in deps[n] & selected):
+                    status[n] = "failed"
+                    print(f"  ✗  {n:<18} blocked by failed dependency")
+                else:
+                    launch(pool, n)
+            if not running:
+                if pending and not ready:
+                    raise RuntimeError("Pipeline stalled — check stage dependencies")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                proc, secs = fut.result()
+                if proc.returncode == 0:
+                    # Re-hash after the run: in-place stages change their inputs.
+                    prev = state["stages"].get(name, {}).get("outputs")
+                    state["stages"][name] = fingerprint(stages[name], cache)
+                    if state["stages"][name]["outputs"] != prev:
+                        changed.add(name)
+                    status[name] = "ran"
+                    print(f"  ✓  {name:<18} done in {secs:.1f}s")
+                elif stages[name].optional:
+                    state["stages"].pop(name, None)
+                    status[name] = "unavailable"
+                    print(f"  ·  {name:<18} exited {proc.returncode} (optional, continuing)")
+                    print(proc.stderr.strip()[-500:])
+                else:
+                    state["stages"].pop(name, None)
+                    status[name] = "failed"
+                    print(f"  ✗  {name:<18} exited {proc.returncode}")
+                    print(proc.stderr.strip()[-2000:])
+
+    if not dry_run:
+        state["files"] = cache
+        save_state(state)
+    return status
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run stale pipeline stages.")
+    ap.add_argument("stages", nargs="*", help="stage names (default: all)")
+    ap.add_argument("--force", action="store_true", help="ignore cached hashes")
+    ap.add_argument("--dry-run", action="store_true", help="only report what would run")
+    ap.add_argument("-j", "--jobs", type=int, default=MAX_WORKERS)
+    args = ap.parse_args(argv)
+
+    print("\nASML valuation pipeline")
+    t0 = time.perf_counter()
+    status = run(args.stages, force=args.force, dry_run=args.dry_run, workers=args.jobs)
+    failed = [n for n, s in status.items() if s == "failed"]
+    print(f"\n{sum(s == 'ran' for s in status.values())} ran, "
+          f"{sum(s == 'skipped' for s in status.values())} skipped, "
+          f"{sum(s == 'unavailable' for s in status.values())} unavailable, "
+          f"{len(failed)} failed in {time.perf_counter() - t0:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
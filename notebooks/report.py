@@ -0,0 +1,445 @@
+"""
+ASML Valuation Analysis — Report Generator
+Renders the investment memo and the README's key-findings blocks from the
+valuation engine instead of hand-typed figures.
+
+Templates live in notebooks/templates/ and use ``$name`` placeholders
+(string.Template). Documents are split into sections — ``## `` headings in
+the memo, ``<!-- report:name -->`` blocks in the README — and each section
+is only re-rendered when its template text or one of the values it uses has
+changed since the last run.
+
+Usage:
+    cd notebooks
+    python report.py                           # memo + README for ASML
+    python report.py --batch a.xlsx b.xlsx …   # one summary per workbook
+
+Output:
+    ../outputs/investment_memo.md
+    ../README.md                      (marked blocks only)
+    ../outputs/memos/<workbook>.md    (batch mode)
+"""
+
+import os
+import re
+import sys
+import json
+import string
+import hashlib
+import argparse
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import fx
+import results
+import valuation
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE          = os.path.dirname(os.path.abspath(__file__))
+ROOT          = os.path.normpath(os.path.join(HERE, ".."))
+TEMPLATE_DIR  = os.path.join(HERE, "templates")
+MEMO_PATH     = os.path.join(ROOT, "outputs", "investment_memo.md")
+README_PATH   = os.path.join(ROOT, "README.md")
+BATCH_DIR     = os.path.join(ROOT, "outputs", "memos")
+CACHE_PATH    = os.path.join(ROOT, "outputs", ".report_cache.json")
+PRICES_PATH   = os.path.join(ROOT, "data", "asml_prices.csv")
+
+# CAPM inputs compared against data/market_data.csv in the memo's data check
+MARKET_FIELDS = {
+    "risk_free": ("risk_free_rate", "Risk-free rate"),
+    "beta":      ("beta", "Beta"),
+    "mrp":       ("market_risk_premium", "Market risk premium"),
+    "wacc":      ("wacc", "WACC"),
+}
+DRIFT_TOLERANCE = 0.02
+
+BLOCK_RE = re.compile(r"<!-- report:(\w+) -->\n(.*?)\n<!-- /report:\1 -->", re.S)
+
+# ─────────────────────────────────────────────
+# 1.  FORMATTING
+# ─────────────────────────────────────────────
+
+def eur(v, cur="€"):
+    return f"{cur}{v:,.0f}"
+
+def eur_m(v, cur="€"):
+    return f"{cur}{v:,.0f}M"
+
+def eur_b(v, cur="€"):
+    return f"{cur}{v / 1000:,.1f}B" if abs(v) < 50_000 else f"{cur}{v / 1000:,.0f}B"
+
+def pct(v, d=1):
+    return f"{v * 100:.{d}f}%"
+
+def pct_short(v):
+    """8% / 1.5% / 9.25% — no trailing zeros, as used for scenario labels."""
+    return f"{v * 100:.2f}".rstrip("0").rstrip(".") + "%"
+
+def mult(v):
+    return f"{v:.1f}×"
+
+def signed_pct(v):
+    return ("−" if v < 0 else "+") + f"{abs(v):.0%}"
+
+def approx(v, cur="€"):
+    return eur(round(v, -1), cur)
+
+
+def premium(x, ref, band=0.05):
+    """'a 12% premium' / 'in line' / 'a 9% discount'."""
+    d = x / ref - 1
+    if abs(d) < band:
+        return "in line"
+    return f"a {abs(d):.0%} {'premium' if d > 0 else 'discount'}"
+
+
+def relative(x, ref, band=0.05):
+    """'a 12% premium to' / 'in line with' / 'a 9% discount to'."""
+    p = premium(x, ref, band)
+    return p + (" with" if p == "in line" else " to")
+
+
+def gap(x, ref):
+    d = x / ref - 1
+    return f"{abs(d):.0%} {'above' if d > 0 else 'below'}"
+
+
+def growth_phases(years, growth):
+    """Collapse the yearly growth row into (first year, last year, rate) runs."""
+    phases, start = [], 0
+    for i in range(1, len(growth) + 1):
+        if i == len(growth) or not np.isclose(growth[i], growth[start]):
+            phases.append((int(years[start]), int(years[i - 1]), float(growth[start])))
+            start = i
+    return phases
+
+
+def growth_rows(phases):
+    rows = []
+    for i, (a, b, g) in enumerate(phases):
+        if len(phases) == 1:
+            why = "Constant growth over the forecast"
+        elif i == 0:
+            why = "In line with management guidance and backlog visibility"
+        elif i == len(phases) - 1:
+            why = "Approaching terminal rate"
+        else:
+            why = "Gradual deceleration as TAM matures"
+        span = f"{a}–{b}" if a != b else f"{a}"
+        rows.append(f"| Revenue growth {span} | {pct_short(g)} p.a. | {why} |")
+    return "\n".join(rows)
+
+# ─────────────────────────────────────────────
+# 2.  CONTEXT FROM ENGINE OUTPUTS
+# ─────────────────────────────────────────────
+
+def price_check(m, rates, path=PRICES_PATH):
+    """Compare the model's share price with the last ADR close, converted
+    at that day's rate. Returns a data-check line or None."""
+    if rates is None or not os.path.exists(path):
+        return None
+    px = pd.read_csv(path)
+    close = fx.tag(pd.Series(px["Close"].to_numpy(), index=px["Date"]), "USD")
+    date, last = close.index[-1], float(close.iloc[-1])
+    local = float(rates.convert(last, fx.currency_of(close), m["currency"], date)[0])
+    if not np.isfinite(local) or abs(local - m["price"]) <= DRIFT_TOLERANCE * local:
+        return None
+    cur = "€" if m["currency"] == "EUR" else m["currency"] + " "
+    return (f"- Share price: model uses {eur(m['price'], cur)}, ADR closed at "
+            f"${last:,.0f} on {str(date)[:10]} (≈ {eur(local, cur)})")
+
+
+def data_check(m, market, rates=None):
+    """List CAPM inputs where the model and data/market_data.csv disagree,
+    and a share price that no longer matches the latest ADR close."""
+    if market is None:
+        return f"No market data for {m.get('company', 'ASML')} (run 03_market_data.py)."
+    lines = []
+    for key, (col, label) in MARKET_FIELDS.items():
+        model_v, data_v = m[key], market.get(col)
+        if data_v is None or not np.isfinite(data_v):
+            continue
+        if abs(model_v - data_v) > DRIFT_TOLERANCE * max(abs(data_v), 1e-9):
+            fmt = (lambda v: f"{v:.2f}") if key == "beta" else pct_short
+            lines.append(f"- {label}: model uses {fmt(model_v)}, "
+                         f"data/market_data.csv has {fmt(data_v)}")
+    price = price_check(m, rates)
+    if price:
+        lines.append(price)
+    if not lines:
+        return "The model's market inputs match data/market_data.csv and the latest ADR close."
+    return ("The model's market inputs differ from the latest data files; "
+            "the figures above use the model's values.\n\n" + "\n".join(lines))
+
+
+def build_context(m, r, grid, shifted, market=None, rates=None):
+    """All template values for one company, already formatted as strings.
+
+    ``r`` is ``valuation.value(m)``, ``grid`` the sensitivity table on the
+    model's axes and ``shifted`` the per-share values at WACC −/+ 100bps.
+    """
+    cur = "€" if m.get("currency", "EUR") == "EUR" else m.get("currency", "") + " "
+    years, rev = m["years"], r["revenue"]
+    hy = m["hist_years"]
+    price, vps = m["price"], float(r["per_share"])
+    upside = float(r["upside"])
+
+    peers = [p for p in m["peers"] if p["name"] != m["company"]]
+    own = next((p for p in m["peers"] if p["name"] == m["company"]), None)
+    med = {k: float(np.median([p[k] for p in peers])) if peers else float("nan")
+           for k in ("ev_ebitda", "pe", "gm")}
+    peer_implied = (m["ebitda"] * med["ev_ebitda"] + m["cash"] - m["debt"]) / m["shares"]
+
+    waccs, growths = m["sens_waccs"], m["sens_growths"]
+    gi_min, wi_min = np.unravel_index(np.argmin(grid), grid.shape)
+    gi_max, wi_max = np.unravel_index(np.argmax(grid), grid.shape)
+    below = int((grid < price).sum())
+    n = grid.size
+    sens_above = ("every single scenario" if below == n else
+                  "none of the scenarios" if below == 0 else
+                  f"{below} of the {n} scenarios")
+    phases = growth_phases(years, m["growth"])
+
+    ctx = {
+        "company":          m["company"],
+        "currency":         m.get("currency", "EUR"),
+        "recommendation":   valuation.recommendation(upside),
+        "value_ps":         eur(vps, cur),
+        "price":            eur(price, cur),
+        "upside_label":     "Upside" if upside >= 0 else "Downside",
+        "upside_pct":       signed_pct(upside),
+        "value_gap":        relative(vps, price, band=0),
+        "dcf_gap":          gap(vps, price),
+        "horizon":          str(len(years)),
+        "proj_years":       f"{years[0]}–{years[-1]}",
+        "proj_cagr_label":  f"'{str(years[0])[2:]}–'{str(years[-1])[2:]}E",
+        "proj_cagr":        pct((rev[-1] / rev[0]) ** (1 / (len(rev) - 1)) - 1),
+        "hist_year_first":  str(hy[0]),
+        "hist_year_last":   str(hy[-1]),
+        "hist_rev_first":   eur_b(m["hist_revenue"][0], cur),
+        "hist_rev_last":    eur_b(m["hist_revenue"][-1], cur),
+        "hist_cagr":        pct((m["hist_revenue"][-1] / m["hist_revenue"][0]) ** (1 / (len(hy) - 1)) - 1),
+        "hist_gm_range":    f"{pct(m['hist_gross_margin'].min())} and {pct(m['hist_gross_margin'].max())}",
+        "hist_fcf_last":    eur_b(m["hist_fcf"][-1], cur),
+        "hist_ni_last":     eur_b(m["hist_net_income"][-1], cur),
+        "growth_rows":      growth_rows(phases),
+        "growth_rows_short": "\n".join(
+            f"| Revenue growth {a}–{b} | {pct_short(g)} p.a. |" for a, b, g in phases),
+        "gross_margin":     pct_short(float(np.mean(m["gross_margin"]))),
+        "ebit_margin":      pct(float(r["ebit"][0] / rev[0])),
+        "tax_rate":         pct_short(float(np.mean(m["tax_rate"]))),
+        "capex_pct":        pct_short(float(np.mean(m["capex_pct"]))),
+        "wacc":             pct(m["wacc"]),
+        "risk_free":        pct(m["risk_free"], 2),
+        "beta":             f"{m['beta']:.2f}",
+        "mrp":              pct(m["mrp"]),
+        "cost_of_equity":   pct(m["cost_of_equity"]),
+        "debt_weight":      pct(1 - m["equity_weight"], 2),
+        "terminal_growth":  pct(m["terminal_growth"]),
+        "pv_fcfs":          eur_m(r["pv_fcfs"], cur),
+        "pv_tv":            eur_m(r["pv_tv"], cur),
+        "pv_fcfs_b":        eur_b(r["pv_fcfs"], cur),
+        "pv_tv_b":          eur_b(r["pv_tv"], cur),
+        "ev":               eur_m(r["ev"], cur),
+        "ev_b":             eur_b(r["ev"], cur),
+        "cash":             eur_m(m["cash"], cur),
+        "debt":             eur_m(m["debt"], cur),
+        "equity":           eur_m(r["equity"], cur),
+        "shares":           f"{m['shares']:,.0f}M",
+        "tv_share":         f"{r['pv_tv'] / r['ev']:.0%}",
+        "asml_ev_ebitda":   mult(own["ev_ebitda"]) if own else "n/a",
+        "asml_pe":          mult(own["pe"]) if own else "n/a",
+        "peer_ev_ebitda":   mult(med["ev_ebitda"]),
+        "peer_pe":          mult(med["pe"]),
+        "peer_gm":          pct(med["gm"]),
+        "ev_ebitda_rel":    relative(own["ev_ebitda"], med["ev_ebitda"]) if own else "n/a",
+        "pe_rel":           relative(own["pe"], med["pe"]) if own else "n/a",
+        "ev_ebitda_prem":   premium(own["ev_ebitda"], med["ev_ebitda"]) if own else "n/a",
+        "pe_prem":          premium(own["pe"], med["pe"]) if own else "n/a",
+        "peer_implied_ps":  eur(peer_implied, cur),
+        "peer_implied_gap": gap(peer_implied, price),
+        "peer_rows":        "\n".join(
+            f"| {p['name']} | {mult(p['ev_ebitda'])} | {mult(p['pe'])} | {pct(p['gm'])} |"
+            for p in m["peers"]),
+        "sens_n":           str(n),
+        "sens_wacc_lo":     pct_short(waccs.min()),
+        "sens_wacc_hi":     pct_short(waccs.max()),
+        "sens_g_lo":        pct_short(growths.min()),
+        "sens_g_hi":        pct_short(growths.max()),
+        "sens_min":         eur(grid.min(), cur),
+        "sens_max":         eur(grid.max(), cur),
+        "sens_min_at":      f"{pct_short(waccs[wi_min])} WACC, {pct_short(growths[gi_min])} terminal growth",
+        "sens_max_at":      f"{pct_short(waccs[wi_max])} WACC, {pct_short(growths[gi_max])} terminal growth",
+        "sens_above":       sens_above,
+        "wacc_down":        pct(m["wacc"] - 0.01),
+        "wacc_up":          pct(m["wacc"] + 0.01),
+        "value_wacc_down":  approx(shifted[0], cur),
+        "value_wacc_up":    approx(shifted[1], cur),
+        "rate_risk_gap":    ("narrowing but not closing the gap to market price"
+                             if shifted[0] < price else "closing the gap to market price"),
+        "data_check":       data_check(m, market, rates),
+    }
+    return ctx
+
+
+def evaluate(models):
+    """Value every model in one vectorised pass; yields (m, r, grid, shifted)."""
+    stacked = valuation.stack_models(models)
+    waccs, growths = models[0]["sens_waccs"], models[0]["sens_growths"]
+    r = valuation.value(stacked)
+    grids = valuation.sensitivity(stacked, waccs, growths)
+    down = valuation.value(stacked, wacc=stacked["wacc"] - 0.01)["per_share"]
+    up = valuation.value(stacked, wacc=stacked["wacc"] + 0.01)["per_share"]
+    for i, m in enumerate(models):
+        m = {**m, "sens_waccs": waccs, "sens_growths": growths}
+        yield m, {k: v[i] for k, v in r.items()}, grids[i], (down[i], up[i])
+
+# ─────────────────────────────────────────────
+# 3.  INCREMENTAL RENDERING
+# ─────────────────────────────────────────────
+
+def load_template(name):
+    with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def split_sections(text):
+    """Split a markdown template before each ``## `` heading."""
+    parts = re.split(r"(?m)^(?=## )", text)
+    return [(p.splitlines()[0] if p.startswith("## ") else "_head", p) for p in parts]
+
+
+def section_key(tmpl, ctx):
+    used = string.Template(tmpl).get_identifiers()
+    payload = json.dumps([tmpl, {k: ctx[k] for k in sorted(used)}], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_sections(doc_id, sections, ctx, cache):
+    """Render [(name, template)] using cached text for unchanged sections.
+
+    Returns ({name: text}, number of sections actually re-rendered).
+    """
+    doc = cache.setdefault(doc_id, {})
+    out, fresh = {}, 0
+    for name, tmpl in sections:
+        key = section_key(tmpl, ctx)
+        hit = doc.get(name)
+        if hit and hit[0] == key:
+            out[name] = hit[1]
+            continue
+        out[name] = string.Template(tmpl).substitute(ctx)
+        doc[name] = [key, out[name]]
+        fresh += 1
+    return out, fresh
+
+
+def load_cache():
+    if os.path.exists(CACHE_PATH):
+        with open(CACHE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_cache(cache):
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    with open(CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+
+def write_if_changed(path, text):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return True
+
+# ─────────────────────────────────────────────
+# 4.  DOCUMENTS
+# ─────────────────────────────────────────────
+
+def render_memo(ctx, cache, path=MEMO_PATH):
+    sections = split_sections(load_template("investment_memo.md"))
+    out, fresh = render_sections(f"memo:{ctx['company']}", sections, ctx, cache)
+    changed = write_if_changed(path, "".join(out[name] for name, _ in sections))
+    return fresh, changed
+
+
+def render_readme(ctx, cache, path=README_PATH):
+    """Replace each ``<!-- report:name -->`` block in the README."""
+    blocks = [(m.group(1), m.group(2)) for m in BLOCK_RE.finditer(load_template("readme_sections.md"))]
+    out, fresh = render_sections("readme", blocks, ctx, cache)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    text = BLOCK_RE.sub(
+        lambda mt: f"<!-- report:{mt.group(1)} -->\n{out.get(mt.group(1), mt.group(2))}\n"
+                   f"<!-- /report:{mt.group(1)} -->",
+        text)
+    return fresh, write_if_changed(path, text)
+
+
+def render_batch(models, out_dir=BATCH_DIR, cache=None, market=None, names=None):
+    """One valuation summary per model; returns the paths written.
+
+    Files are named by ``names`` (the workbook stems from the command line)
+    or, failing that, by company; duplicate names raise ValueError rather
+    than overwrite each other. ``market`` holds ASML's CAPM inputs, so only
+    ASML's summary is checked against it.
+    """
+    cache = {} if cache is None else cache
+    names = list(names) if names is not None else [m["company"] for m in models]
+    dupes = sorted({n for n in names if names.count(n) > 1})
+    if dupes:
+        raise ValueError(f"Duplicate summary names: {', '.join(dupes)}")
+    sections = split_sections(load_template("valuation_summary.md"))
+    written = []
+    for name, (m, r, grid, shifted) in zip(names, evaluate(models)):
+        ctx = build_context(m, r, grid, shifted, market if m["company"] == "ASML" else None)
+        out, _ = render_sections(f"summary:{name}", sections, ctx, cache)
+        path = os.path.join(out_dir, f"{name}.md")
+        if write_if_changed(path, "".join(out[name] for name, _ in sections)):
+            written.append(path)
+    return written
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render reports from the valuation engine.")
+    ap.add_argument("--batch", nargs="+", metavar="XLSX", help="workbooks to summarise")
+    ap.add_argument("--full", action="store_true", help="ignore the section cache")
+    args = ap.parse_args(argv)
+
+    cache = {} if args.full else load_cache()
+    market = valuation.load_market_data()
+
+    if args.batch:
+        with ProcessPoolExecutor() as pool:
+            models = list(pool.map(valuation.load_model, args.batch))
+        names = [os.path.splitext(os.path.basename(p))[0] for p in args.batch]
+        written = render_batch(models, cache=cache, market=market, names=names)
+        print(f"  ✓  {len(written)} of {len(models)} summaries updated in outputs/memos/")
+    else:
+        print("\nRendering reports from ASML_DCF_Model.xlsx …")
+        (m, r, grid, shifted), = evaluate([valuation.load_model()])
+        ctx = build_context(m, r, grid, shifted, market, fx.load())
+        with closing(results.connect()) as conn:
+            results.record_model(conn, m, source="report.py")
+        fresh, changed = render_memo(ctx, cache)
+        print(f"  {'✓' if changed else '·'}  investment_memo.md  ({fresh} section(s) re-rendered)")
+        fresh, changed = render_readme(ctx, cache)
+        print(f"  {'✓' if changed else '·'}  README.md           ({fresh} block(s) re-rendered)")
+
+    save_cache(cache)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+ASML Valuation Analysis — Results Database
+Keeps every valuation the project computes in a local SQLite file
+(outputs/results.sqlite) instead of only the latest numbers in the
+workbook, the PNGs and market_data.csv.
+
+Each call to ``record`` is one *run* (source script, ticker, as-of date,
+scenario, inputs hash). It stores one *valuation* row per element of a
+batched ``valuation.value`` result: WACC, g, the equity bridge, and the
+FCF and discount-factor vectors as float64 blobs. Rows are written with
+one ``executemany`` per run, so a 100k-sample sweep is a single
+transaction.
+
+Indexed on (ticker, as_of, scenario) and (scenario, wacc), so queries
+such as "value per share over time for every ticker at a 9% WACC" read
+only the matching rows.
+
+Usage:
+    cd notebooks
+    python results.py record                       # store today's base case + grid
+    python results.py history                      # base-case history, all tickers
+    python results.py history --scenario sensitivity --wacc 0.09
+    python results.py runs                         # list stored runs
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+import valuation
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE    = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(HERE, "..", "outputs", "results.sqlite")
+WACC_TOL = 5e-4         # "at 9%" matches 8.95%–9.05%
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id       INTEGER PRIMARY KEY,
+    created_at   TEXT    NOT NULL,
+    source       TEXT,
+    ticker       TEXT    NOT NULL,
+    as_of        TEXT    NOT NULL,
+    scenario     TEXT    NOT NULL,
+    inputs_hash  TEXT    NOT NULL,
+    n            INTEGER NOT NULL,
+    params       TEXT                -- JSON list naming valuations.params
+);
+CREATE TABLE IF NOT EXISTS valuations (
+    valuation_id     INTEGER PRIMARY KEY,
+    run_id           INTEGER NOT NULL REFERENCES runs(run_id),
+    ticker           TEXT    NOT NULL,
+    as_of            TEXT    NOT NULL,
+    scenario         TEXT    NOT NULL,
+    wacc             REAL,
+    terminal_growth  REAL,
+    pv_fcfs          REAL,
+    terminal_value   REAL,
+    pv_tv            REAL,
+    ev               REAL,
+    equity           REAL,
+    per_share        REAL,
+    price            REAL,
+    upside           REAL,
+    fcf              BLOB,
+    discount_factors BLOB,
+    params           BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_valuations_key  ON valuations (ticker, as_of, scenario);
+CREATE INDEX IF NOT EXISTS idx_valuations_wacc ON valuations (scenario, wacc);
+CREATE INDEX IF NOT EXISTS idx_runs_key        ON runs (ticker, as_of, scenario);
+"""
+
+SCALAR_COLUMNS = ("pv_fcfs", "terminal_value", "pv_tv", "ev", "equity", "per_share", "upside")
+VECTOR_COLUMNS = ("fcf", "discount_factors")
+
+# ─────────────────────────────────────────────
+# 1.  CONNECTION
+# ─────────────────────────────────────────────
+
+def connect(path=DB_PATH):
+    """Open (and if needed create) the results database."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+# ─────────────────────────────────────────────
+# 2.  WRITING
+# ─────────────────────────────────────────────
+
+def _blobs(a, shape):
+    """(…, years) array → one float64 blob per result element (None if absent)."""
+    rows = int(np.prod(shape))
+    if a is None:
+        return [None] * rows
+    a = np.asarray(a, dtype=np.float64)
+    a = np.ascontiguousarray(np.broadcast_to(a, shape + a.shape[-1:]).reshape(rows, -1))
+    return [r.tobytes() for r in a]
+
+
+def _broadcast(v, shape, dtype=float):
+    """``v`` broadcast to ``shape`` and flattened.
+
+    An array matching the leading axes (e.g. one price per company of a
+    stacked model) is aligned there; anything else broadcasts as NumPy does.
+    """
+    a = np.asarray(v, dtype=dtype)
+    if 0 < a.ndim < len(shape) and a.shape == tuple(shape[:a.ndim]):
+        a = a.reshape(a.shape + (1,) * (len(shape) - a.ndim))
+    return np.broadcast_to(a, shape).reshape(-1)
+
+
+def record(conn, m, result, scenario="base", as_of=None, params=None, source=None):
+    """Store a (possibly batched) ``valuation.value`` result as one run.
+
+    ``m`` is the model the result came from, or a ``valuation.stack_models``
+    result whose ``company`` list and per-company inputs line up with the
+    result's leading axis. ``params`` holds extra
+    per-row inputs worth keeping (e.g. Sobol driver shifts): a dict of
+    arrays broadcastable to the result, packed into a float64 blob per
+    row with the names on the run. Overridden ``wacc`` / ``terminal_growth``
+    arrays should be passed here as well.
+    Returns the run id.
+    """
+    params = dict(params or {})
+    shape = np.shape(result["per_share"])
+    rows = int(np.prod(shape))
+    col = lambda v: _broadcast(v, shape)
+
+    ticker = _broadcast(m.get("company", "ASML"), shape, dtype=object)
+    as_of = str(as_of or dt.date.today())
+    wacc = col(params.pop("wacc", m["wacc"]))
+    growth = col(params.pop("terminal_growth", m["terminal_growth"]))
+    price = col(m["price"])
+    scalars = [col(result[k]) for k in SCALAR_COLUMNS]
+    vectors = [_blobs(result.get(k), shape) for k in VECTOR_COLUMNS]
+    extra = (_blobs(np.stack([col(v) for v in params.values()], axis=-1), (rows,))
+             if params else [None] * rows)
+
+    with conn:
+        tickers = sorted(set(ticker))
+        cur = conn.execute(
+            "INSERT INTO runs (created_at, source, ticker, as_of, scenario, inputs_hash, n, params) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (dt.datetime.now().isoformat(timespec="seconds"), source,
+             tickers[0] if len(tickers) == 1 else ",".join(tickers),
+             as_of, scenario, valuation.inputs_hash(m), rows,
+             json.dumps(list(params)) if params else None))
+        run_id = cur.lastrowid
+        cols = {
+            "run_id": [run_id] * rows, "ticker": ticker.tolist(),
+            "as_of": [as_of] * rows, "scenario": [scenario] * rows,
+            "wacc": wacc.tolist(), "terminal_growth": growth.tolist(), "price": price.tolist(),
+            **{k: v.tolist() for k, v in zip(SCALAR_COLUMNS, scalars)},
+            **dict(zip(VECTOR_COLUMNS, vectors)), "params": extra,
+        }
+        conn.executemany(
+            f"INSERT INTO valuations ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            zip(*cols.values()))
+    return run_id
+
+
+def record_model(conn, m, as_of=None, source=None):
+    """Base case plus the Sensitivity-tab grid for one model; returns run ids."""
+    base = record(conn, m, valuation.value(m), "base", as_of, source=source)
+    W, G = np.meshgrid(m["sens_waccs"], m["sens_growths"])
+    grid = valuation.value(m, wacc=W, terminal_growth=G)
+    sens = record(conn, m, grid, "sensitivity", as_of,
+                  params={"wacc": W, "terminal_growth": G}, source=source)
+    return base, sens
+
+# ─────────────────────────────────────────────
+# 3.  QUERIES
+# ─────────────────────────────────────────────
+
+def history(conn, tickers=None, scenario="base", wacc=None, terminal_growth=None,
+            start=None, end=None, tol=WACC_TOL):
+    """Per-share value over time; filters are optional and use the indexes.
+
+    With several matching rows per (ticker, as_of) — e.g. repeated runs on
+    one day — the latest run containing that ticker wins, including
+    batched runs that valued several companies at once.
+    """
+    where, args = ["v.scenario = ?"], [scenario]
+    if tickers:
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        where.append(f"v.ticker IN ({', '.join('?' * len(tickers))})")
+        args += tickers
+    if wacc is not None:
+        where.append("v.wacc BETWEEN ? AND ?")
+        args += [wacc - tol, wacc + tol]
+    if terminal_growth is not None:
+        where.append("v.terminal_growth BETWEEN ? AND ?")
+        args += [terminal_growth - tol, terminal_growth + tol]
+    if start:
+        where.append("v.as_of >= ?")
+        args.append(str(start))
+    if end:
+        where.append("v.as_of <= ?")
+        args.append(str(end))
+    sql = (
+        "SELECT v.ticker, v.as_of, v.wacc, v.terminal_growth, v.ev, v.per_share, "
+        "v.price, v.upside, v.run_id FROM valuations v WHERE " + " AND ".join(where)
+        + " AND v.run_id = (SELECT MAX(v2.run_id) FROM valuations v2 WHERE v2.ticker = v.ticker "
+          "AND v2.as_of = v.as_of AND v2.scenario = v.scenario) "
+        "ORDER BY v.ticker, v.as_of, v.terminal_growth, v.wacc"
+    )
+    return pd.read_sql_query(sql, conn, params=args, parse_dates=["as_of"])
+
+
+def vectors(conn, valuation_id):
+    """FCF and discount-factor arrays stored for one valuation row."""
+    row = conn.execute(
+        f"SELECT {', '.join(VECTOR_COLUMNS)} FROM valuations WHERE valuation_id = ?",
+        (valuation_id,)).fetchone()
+    if row is None:
+        raise KeyError(f"No valuation {valuation_id}")
+    return {k: None if b is None else np.frombuffer(b) for k, b in zip(VECTOR_COLUMNS, row)}
+
+
+def run_params(conn, run_id):
+    """Per-row ``params`` of one run as a DataFrame indexed by valuation_id."""
+    names = conn.execute("SELECT params FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    if names is None or names[0] is None:
+        return pd.DataFrame()
+    rows = conn.execute("SELECT valuation_id, params FROM valuations WHERE run_id = ? "
+                        "ORDER BY valuation_id", (run_id,)).fetchall()
+    ids, blobs = zip(*rows)
+    values = np.frombuffer(b"".join(blobs)).reshape(len(ids), -1)
+    return pd.DataFrame(values, columns=json.loads(names[0]),
+                        index=pd.Index(ids, name="valuation_id"))
+
+
+def runs(conn, ticker=None):
+    """Stored runs; ``ticker`` also matches batched runs that include it."""
+    sql = ("SELECT * FROM runs"
+           + (" WHERE ',' || ticker || ',' LIKE '%,' || ? || ',%'" if ticker else "")
+           + " ORDER BY run_id")
+    return pd.read_sql_query(sql, conn, params=[ticker] if ticker else [])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("record")
+    h = sub.add_parser("history")
+    h.add_argument("--ticker", nargs="+")
+    h.add_argument("--scenario", default="base")
+    h.add_argument("--wacc", type=float)
+    h.add_argument("--growth", type=float)
+    sub.add_parser("runs")
+    args = ap.parse_args()
+
+    conn = connect()
+    if args.cmd == "record":
+        m = valuation.load_model()
+        ids = record_model(conn, m, source="results.py")
+        print(f"  ✓  Recorded runs {ids} for {m['company']} in outputs/results.sqlite")
+    elif args.cmd == "history":
+        df = history(conn, args.ticker, args.scenario, args.wacc, args.growth)
+        df["as_of"] = df["as_of"].dt.date
+        print(df.drop(columns="run_id").round(4).to_string(index=False) if len(df) else "No matching runs.")
+    else:
+        print(runs(conn).to_string(index=False))
+    conn.close()
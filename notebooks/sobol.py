@@ -0,0 +1,235 @@
+"""
+ASML Valuation Analysis — Global Sensitivity (Sobol Indices)
+Ranks which DCF drivers explain the spread in value per share. The
+Sensitivity tab moves only WACC and g; here every driver is varied over a
+plausible range at once and the variance of the result is decomposed into
+first-order (S1) and total (ST) Sobol indices.
+
+Sampling follows Saltelli: two scrambled Sobol (quasi-Monte Carlo) matrices
+A and B with N rows, and for each input i a matrix AB_i, which is A with
+column i taken from B. That gives N·(d + 2) valuations, and N itself
+grows with the number of inputs d. All of them go through
+``valuation.value`` as stacked arrays in a few batched calls.
+
+Model outputs for A, B and each AB_i are cached on disk, keyed by the
+model inputs, driver ranges and N. ``--only <driver>`` then evaluates just
+that driver's N extra rows; a full run re-uses every cached column.
+
+A one-at-a-time tornado (each driver at its low / high bound, the rest at
+base) is computed alongside for the chart.
+
+Usage:
+    cd notebooks
+    python sobol.py                    # indices for every driver
+    python sobol.py --only wacc        # one driver, re-using cached samples
+    python sobol.py --record           # also store every sample in results.sqlite
+
+Output:
+    ../outputs/sobol_indices.csv
+
+Requires scipy (for the Sobol sequence).
+"""
+
+import os
+import json
+import hashlib
+import zipfile
+import argparse
+from contextlib import closing
+import numpy as np
+import pandas as pd
+
+import valuation
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE       = os.path.dirname(os.path.abspath(__file__))
+OUT_PATH   = os.path.join(HERE, "..", "outputs", "sobol_indices.csv")
+CACHE_PATH = os.path.join(HERE, "..", "outputs", ".sobol_cache.npz")
+
+# driver -> (label, low, high) as additive shifts to the workbook value;
+# path inputs (growth, margins) shift every projection year equally.
+DRIVERS = {
+    "wacc":            ("WACC",               -0.015, 0.015),
+    "terminal_growth": ("Terminal growth",    -0.010, 0.010),
+    "growth":          ("Revenue growth",     -0.030, 0.030),
+    "gross_margin":    ("Gross margin",       -0.050, 0.050),
+    "rd_pct":          ("R&D % of revenue",   -0.020, 0.020),
+    "sga_pct":         ("SG&A % of revenue",  -0.010, 0.010),
+    "tax_rate":        ("Tax rate",           -0.030, 0.030),
+    "capex_pct":       ("CapEx % of revenue", -0.020, 0.020),
+    "nwc_pct":         ("NWC % of revenue",   -0.050, 0.050),
+    "da_pct":          ("D&A % of revenue",   -0.010, 0.010),
+}
+SAMPLES_PER_INPUT = 512      # N = next power of two ≥ this × d
+SEED              = 2026
+BATCH             = 65_536   # rows per valuation call
+
+# ─────────────────────────────────────────────
+# 1.  SAMPLING & EVALUATION
+# ─────────────────────────────────────────────
+
+def base_samples(d):
+    n = SAMPLES_PER_INPUT * d
+    return 1 << int(np.ceil(np.log2(n)))
+
+
+def sample(n, drivers=DRIVERS, seed=SEED):
+    """Saltelli A and B matrices of driver shifts, each (n, d)."""
+    from scipy.stats import qmc
+
+    d = len(drivers)
+    u = qmc.Sobol(2 * d, scramble=True, seed=seed).random(n)
+    lo = np.array([v[1] for v in drivers.values()])
+    hi = np.array([v[2] for v in drivers.values()])
+    x = lo + (hi - lo) * np.concatenate([u[:, :d], u[:, d:]])
+    return x[:n], x[n:]
+
+
+def evaluate(m, shifts, drivers=DRIVERS, batch=BATCH):
+    """Value per share for each row of driver shifts, (rows, d) → (rows,)."""
+    out = np.empty(len(shifts))
+    for s in range(0, len(shifts), batch):
+        x = shifts[s:s + batch]
+        overrides = {}
+        for k, name in enumerate(drivers):
+            base = np.asarray(m[name], dtype=float)
+            # vector inputs get (rows, years), scalars (rows,)
+            overrides[name] = base + (x[:, k, None] if base.ndim else x[:, k])
+        out[s:s + batch] = valuation.value(m, **overrides)["per_share"]
+    return out
+
+
+def cache_key(m, drivers, n):
+    payload = json.dumps([valuation.inputs_hash(m), drivers, n, SEED])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_cache(key, path=CACHE_PATH):
+    """Cached sample outputs for ``key``; a stale or unreadable file is a miss."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with np.load(path) as z:
+            if str(z["key"]) == key:
+                return {k: z[k] for k in z.files if k != "key"}
+    except (zipfile.BadZipFile, ValueError, KeyError, EOFError, OSError):
+        pass
+    return {}
+
+
+def save_cache(key, cache, path=CACHE_PATH):
+    """Write the cache to a temp file and swap it in, so readers never see a torn file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, key=key, **cache)
+    os.replace(tmp, path)
+
+# ─────────────────────────────────────────────
+# 2.  INDICES
+# ─────────────────────────────────────────────
+
+def indices(f_a, f_b, f_ab):
+    """First-order (Saltelli 2010) and total (Jansen) indices.
+
+    ``f_ab`` is (inputs, n); returns (S1, ST) arrays of length inputs.
+    """
+    var = np.var(np.concatenate([f_a, f_b]))
+    s1 = np.mean(f_b * (f_ab - f_a), axis=-1) / var
+    st = 0.5 * np.mean((f_a - f_ab) ** 2, axis=-1) / var
+    return s1, st
+
+
+def run(m, only=None, drivers=DRIVERS, use_cache=True):
+    """Sobol indices for ``only`` (a list of drivers) or every driver.
+
+    Returns a DataFrame indexed by driver with S1, ST and the number of new
+    valuations this call needed in ``df.attrs["evaluations"]``.
+    """
+    names = list(drivers)
+    only = names if only is None else list(only)
+    n = base_samples(len(names))
+    key = cache_key(m, drivers, n)
+    cache = load_cache(key) if use_cache else {}
+
+    a, b = sample(n, drivers)
+    todo = [("A", a), ("B", b)] if "A" not in cache else []
+    for name in only:
+        if f"AB_{name}" not in cache:
+            ab = a.copy()
+            k = names.index(name)
+            ab[:, k] = b[:, k]
+            todo.append((f"AB_{name}", ab))
+    if todo:
+        f = evaluate(m, np.concatenate([x for _, x in todo]), drivers)
+        cache.update({label: part for (label, _), part in zip(todo, np.split(f, len(todo)))})
+        if use_cache:
+            save_cache(key, cache)
+
+    s1, st = indices(cache["A"], cache["B"], np.stack([cache[f"AB_{k}"] for k in only]))
+    df = pd.DataFrame({"driver": only, "label": [drivers[k][0] for k in only],
+                       "S1": s1, "ST": st}).set_index("driver")
+    df.attrs["evaluations"] = n * len(todo)
+    df.attrs["samples"] = n
+    return df
+
+
+def load_indices(path=OUT_PATH):
+    """The indices last saved by ``python sobol.py`` (the global_sensitivity stage)."""
+    return pd.read_csv(path, index_col="driver")
+
+
+def tornado(m, drivers=DRIVERS):
+    """Value per share with each driver alone at its low and high shift.
+
+    Returns a DataFrame indexed by driver with low / high values, sorted by
+    swing (largest first); one batched call of 2·d valuations.
+    """
+    d = len(drivers)
+    lo = np.array([v[1] for v in drivers.values()])
+    hi = np.array([v[2] for v in drivers.values()])
+    shifts = np.zeros((2 * d, d))
+    shifts[np.arange(d), np.arange(d)] = lo
+    shifts[d + np.arange(d), np.arange(d)] = hi
+    f = evaluate(m, shifts, drivers)
+    df = pd.DataFrame({"label": [v[0] for v in drivers.values()],
+                       "low": f[:d], "high": f[d:]}, index=list(drivers))
+    df["swing"] = (df["high"] - df["low"]).abs()
+    return df.sort_values("swing", ascending=False)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--only", nargs="+", choices=list(DRIVERS), metavar="DRIVER",
+                    help="compute indices for these drivers only")
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--record", action="store_true",
+                    help="store the A / B sample valuations in outputs/results.sqlite")
+    args = ap.parse_args()
+
+    m = valuation.load_model()
+    df = run(m, args.only, use_cache=not args.no_cache)
+    if args.record:
+        import results
+
+        a, b = sample(df.attrs["samples"])
+        x = np.concatenate([a, b])
+        overrides = {k: np.asarray(m[k], dtype=float) + (x[:, i, None] if np.ndim(m[k]) else x[:, i])
+                     for i, k in enumerate(DRIVERS)}
+        with closing(results.connect()) as conn:
+            run_id = results.record(
+                conn, m, valuation.value(m, **overrides), "sobol",
+                params={**{f"{k}_shift": x[:, i] for i, k in enumerate(DRIVERS)},
+                        "wacc": overrides["wacc"], "terminal_growth": overrides["terminal_growth"]},
+                source="sobol.py")
+        print(f"  ✓  Recorded run {run_id} ({len(x):,} valuations) in outputs/results.sqlite")
+    print(f"\nSobol indices — N = {df.attrs['samples']:,} base samples, "
+          f"{df.attrs['evaluations']:,} new valuations")
+    print(df.sort_values("ST", ascending=False)[["label", "S1", "ST"]].round(3).to_string())
+    if args.only is None:
+        os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+        df.to_csv(OUT_PATH)
+        print(f"  ✓  Saved {os.path.relpath(OUT_PATH, os.path.join(HERE, '..'))}")
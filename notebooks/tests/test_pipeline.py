@@ -0,0 +1,84 @@
+import numpy as np
+
+import pipeline
+from pipeline import Stage
+
+
+def _script(path, body):
+    path.write_text(body)
+    return str(path)
+
+
+def _stages(tmp_path, fetch_body, volatile=True):
+    fetched, derived = tmp_path / "fetched.txt", tmp_path / "derived.txt"
+    fetch = _script(tmp_path / "fetch.py", fetch_body.format(out=str(fetched)))
+    build = _script(tmp_path / "build.py",
+                    f"open({str(derived)!r}, 'a').write(open({str(fetched)!r}).read()[-2:])\n")
+    return [
+        Stage("fetch", fetch, outputs=[str(fetched)], volatile=volatile),
+        Stage("build", build, inputs=[str(fetched)], outputs=[str(derived)]),
+    ], fetched, derived
+
+
+def _run(monkeypatch, tmp_path, stages):
+    monkeypatch.setattr(pipeline, "STATE_PATH", str(tmp_path / "state.json"))
+    return pipeline.run(stages=stages, workers=1)
+
+
+def test_volatile_stage_runs_every_time(monkeypatch, tmp_path):
+    stages, fetched, derived = _stages(tmp_path, "open({out!r}, 'a').write('x\\n')\n")
+    assert _run(monkeypatch, tmp_path, stages) == {"fetch": "ran", "build": "ran"}
+    assert _run(monkeypatch, tmp_path, stages) == {"fetch": "ran", "build": "ran"}
+    assert fetched.read_text() == "x\nx\n"
+    assert derived.read_text() == "x\nx\n"
+
+
+def test_unchanged_fetch_does_not_rerun_downstream(monkeypatch, tmp_path):
+    stages, fetched, _ = _stages(tmp_path, "open({out!r}, 'w').write('same\\n')\n")
+    _run(monkeypatch, tmp_path, stages)
+    assert _run(monkeypatch, tmp_path, stages) == {"fetch": "ran", "build": "skipped"}
+
+
+def test_non_volatile_stage_is_skipped_when_fresh(monkeypatch, tmp_path):
+    stages, fetched, _ = _stages(tmp_path, "open({out!r}, 'a').write('x\\n')\n", volatile=False)
+    _run(monkeypatch, tmp_path, stages)
+    assert _run(monkeypatch, tmp_path, stages) == {"fetch": "skipped", "build": "skipped"}
+    assert fetched.read_text() == "x\n"
+
+
+FAKE_YAHOO = """\
+import os, sys
+import numpy as np
+sys.path.insert(0, {notebooks!r})
+import bars
+
+# Each call serves an overlapping 200-minute window that has moved on by
+# 100 minutes, like Yahoo's rolling 7 days of 1-minute bars.
+counter = os.path.join({root!r}, "calls")
+k = int(open(counter).read()) if os.path.exists(counter) else 0
+open(counter, "w").write(str(k + 1))
+ts = (1_767_000_000 + 60 * np.arange(100 * k, 100 * k + 200)) * bars.NS
+px = np.full(len(ts), 100.0)
+bars.BarStore("ASML", "1m", {root!r}).append(
+    {{"ts": ts, "open": px, "high": px, "low": px, "close": px, "volume": px}})
+"""
+
+
+def test_intraday_bars_stage_builds_history(monkeypatch, tmp_path):
+    import dataclasses
+    import bars
+
+    real = next(s for s in pipeline.STAGES if s.name == "intraday_bars")
+    root = tmp_path / "bars"
+    root.mkdir()
+    script = _script(tmp_path / "fake_bars.py",
+                     FAKE_YAHOO.format(notebooks=pipeline.HERE, root=str(root)))
+    stage = dataclasses.replace(real, script=script,
+                                outputs=[str(root / "ASML" / "1m" / "ts.i8")])
+    store = bars.BarStore("ASML", "1m", str(root))
+
+    assert _run(monkeypatch, tmp_path, [stage]) == {"intraday_bars": "ran"}
+    assert len(store) == 200
+    assert _run(monkeypatch, tmp_path, [stage]) == {"intraday_bars": "ran"}
+    assert len(store) == 300
+    assert np.all(np.diff(store.columns.ts) == 60 * bars.NS)
@@ -0,0 +1,30 @@
+import shutil
+
+import pytest
+
+import report
+import valuation
+
+
+@pytest.fixture(scope="module")
+def twin_workbooks(tmp_path_factory):
+    """Two workbook files that share the template's title (ASML)."""
+    d = tmp_path_factory.mktemp("workbooks")
+    paths = [d / "ASML_copy_1.xlsx", d / "ASML_copy_2.xlsx"]
+    for p in paths:
+        shutil.copy(valuation.EXCEL_PATH, p)
+    return paths
+
+
+def test_batch_summaries_named_after_workbooks(twin_workbooks, tmp_path):
+    models = [valuation.load_model(p) for p in twin_workbooks]
+    assert models[0]["company"] == models[1]["company"]
+    written = report.render_batch(models, out_dir=tmp_path, names=[p.stem for p in twin_workbooks])
+    assert sorted(p.rsplit("/", 1)[-1] for p in written) == ["ASML_copy_1.md", "ASML_copy_2.md"]
+
+
+def test_batch_duplicate_names_raise(twin_workbooks, tmp_path):
+    models = [valuation.load_model(p) for p in twin_workbooks]
+    with pytest.raises(ValueError, match="ASML"):
+        report.render_batch(models, out_dir=tmp_path)
+    assert not list(tmp_path.iterdir())
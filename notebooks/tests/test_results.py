@@ -0,0 +1,47 @@
+from contextlib import closing
+
+import numpy as np
+import pytest
+
+import results
+import valuation
+
+
+@pytest.fixture(scope="module")
+def two_companies():
+    m = valuation.load_model()
+    other = {**m, "company": "AMAT", "price": 180.0, "shares": 800.0}
+    return m, other
+
+
+def test_record_stacked_model(two_companies, tmp_path):
+    stacked = valuation.stack_models(two_companies)
+    assert stacked["company"] == ["ASML", "AMAT"]
+    with closing(results.connect(str(tmp_path / "r.sqlite"))) as conn:
+        results.record(conn, stacked, valuation.value(stacked), as_of="2026-01-02")
+        df = results.history(conn).set_index("ticker")
+    assert sorted(df.index) == ["AMAT", "ASML"]
+    assert df.loc["AMAT", "price"] == 180.0
+    assert df.loc["ASML", "price"] == two_companies[0]["price"]
+    assert df.loc["AMAT", "per_share"] != pytest.approx(df.loc["ASML", "per_share"])
+
+
+def test_record_stacked_grid(two_companies, tmp_path):
+    stacked = valuation.stack_models(two_companies)
+    m = two_companies[0]
+    W, G = np.meshgrid(m["sens_waccs"], m["sens_growths"])
+    # companies on the leading axis, the (growth, wacc) grid behind it
+    lead = {k: np.asarray(v)[:, None, None] for k, v in stacked.items()
+            if k in valuation.SCALAR_INPUTS}
+    lead.update({k: np.asarray(stacked[k])[:, None, None, :] for k in valuation.VECTOR_INPUTS})
+    grid = valuation.value({**stacked, **lead}, wacc=W, terminal_growth=G)
+    assert grid["per_share"].shape == (2,) + W.shape
+    with closing(results.connect(str(tmp_path / "r.sqlite"))) as conn:
+        results.record(conn, stacked, grid, "sensitivity", as_of="2026-01-02",
+                       params={"wacc": W, "terminal_growth": G})
+        df = results.history(conn, scenario="sensitivity", wacc=0.09)
+    assert df.groupby("ticker").size().to_dict() == {"AMAT": len(G), "ASML": len(G)}
+    assert set(df.loc[df["ticker"] == "AMAT", "price"]) == {180.0}
+    np.testing.assert_allclose(
+        df.loc[df["ticker"] == "ASML", "per_share"],
+        valuation.sensitivity(m, [0.09], m["sens_growths"])[:, 0])
@@ -0,0 +1,18 @@
+import numpy as np
+
+import sobol
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "cache.npz")
+    sobol.save_cache("k", {"A": np.arange(3.0)}, path)
+    assert list(tmp_path.iterdir()) == [tmp_path / "cache.npz"]
+    np.testing.assert_array_equal(sobol.load_cache("k", path)["A"], np.arange(3.0))
+    assert sobol.load_cache("other", path) == {}
+
+
+def test_truncated_cache_is_a_miss(tmp_path):
+    path = tmp_path / "cache.npz"
+    sobol.save_cache("k", {"A": np.arange(1000.0)}, str(path))
+    path.write_bytes(path.read_bytes()[:200])
+    assert sobol.load_cache("k", str(path)) == {}
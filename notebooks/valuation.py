@@ -0,0 +1,268 @@
+"""
+ASML Valuation Analysis — Valuation Engine
+Reproduces the workbook's Projections and DCF Calculation tabs in NumPy so
+the valuation can be recomputed (and re-used by the report, charts and
+sensitivity stages) without opening Excel.
+
+Every scenario input may be a scalar or an array; arrays broadcast against
+each other, with the projection years on the last axis of the FCF arrays.
+Passing e.g. an (8, 1) terminal-growth column and an (11,) WACC row values
+the whole sensitivity table in one call.
+
+Usage:
+    cd notebooks
+    python valuation.py                # print the base case from the workbook
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import openpyxl
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE       = os.path.dirname(os.path.abspath(__file__))
+EXCEL_PATH = os.path.join(HERE, "..", "models", "ASML_DCF_Model.xlsx")
+DATA_DIR   = os.path.join(HERE, "..", "data")
+
+BASE_YEAR  = 2025
+HORIZON    = 10
+
+# Workbook rows on the Projections tab (columns B-K = 2026E-2035E)
+PROJ_ROWS = {
+    "growth":       7,
+    "gross_margin": 10,
+    "tax_rate":     12,
+    "capex_pct":    15,
+    "nwc_pct":      17,
+}
+COMP_ROWS  = range(5, 10)     # Comparables tab: the company, then up to four peers
+
+# ─────────────────────────────────────────────
+# 1.  LOAD THE MODEL
+# ─────────────────────────────────────────────
+
+def _row(ws, row, start_col=2, ncols=HORIZON):
+    return np.array([ws.cell(row, start_col + i).value or 0.0 for i in range(ncols)], dtype=float)
+
+
+def load_model(path=EXCEL_PATH):
+    """Read the assumptions and balance-sheet items the DCF depends on.
+
+    Returns a flat dict of floats and NumPy arrays. Formula cells are read
+    from Excel's cached values, so the workbook must have been saved by
+    Excel (as it is in the repository).
+    """
+    wb = openpyxl.load_workbook(path, data_only=True)
+    hist, proj = wb["Historical Financials"], wb["Projections"]
+    dcf, wacc, comp = wb["DCF Calculation"], wb["WACC"], wb["Comparables"]
+
+    m = {name: _row(proj, r) for name, r in PROJ_ROWS.items()}
+    m.update({
+        "company":         wb.properties.title or "ASML",   # set by workbooks.py
+        "currency":        "EUR",
+        "years":           np.arange(BASE_YEAR + 1, BASE_YEAR + 1 + HORIZON),
+        "hist_years":      np.arange(BASE_YEAR - 4, BASE_YEAR + 1),
+        "hist_revenue":    _row(hist, 6, ncols=5),
+        "hist_ebitda":     _row(hist, 11, ncols=5),
+        "hist_ebit":       _row(hist, 12, ncols=5),
+        "hist_net_income": _row(hist, 15, ncols=5),
+        "hist_gross_margin": _row(hist, 31, ncols=5),
+        "hist_fcf":        _row(hist, 36, ncols=5),
+        "base_revenue":    float(hist["F6"].value),
+        "rd_pct":          float(hist["I10"].value),
+        "sga_pct":         float(hist["I12"].value),
+        "da_pct":          0.03,                        # Projections row 38
+        "cash":            float(hist["F19"].value),
+        "debt":            float(hist["F20"].value),    # DCF Calculation!D35
+        "shares":          float(dcf["D39"].value),
+        "price":           float(dcf["D42"].value),
+        "wacc":            float(wacc["C36"].value),
+        "terminal_growth": float(dcf["B20"].value),
+        "risk_free":       float(wacc["C7"].value),
+        "beta":            float(wacc["C8"].value),
+        "mrp":             float(wacc["C9"].value),
+        "cost_of_equity":  float(wacc["C11"].value),
+        "cost_of_debt":    float(wacc["C19"].value),
+        "equity_weight":   float(wacc["C32"].value),
+    })
+    m["ebitda"] = float(m["hist_ebitda"][-1])
+
+    peers = []
+    for r in COMP_ROWS:
+        name = comp.cell(r, 1).value
+        if name:
+            peers.append({
+                "name":      name,
+                "mcap":      comp.cell(r, 2).value or 0.0,
+                "ev_ebitda": comp.cell(r, 3).value or 0.0,
+                "pe":        comp.cell(r, 4).value or 0.0,
+                "ev_rev":    comp.cell(r, 5).value or 0.0,
+                "gm":        comp.cell(r, 6).value or 0.0,
+                "beta":      comp.cell(r, 7).value or 0.0,
+                "growth":    comp.cell(r, 8).value or 0.0,
+            })
+    m["peers"] = peers
+
+    sens = wb["Sensitivity"]
+    m["sens_waccs"]   = np.array([sens.cell(5, c).value for c in range(2, 13)
+                                  if sens.cell(5, c).value is not None], dtype=float)
+    m["sens_growths"] = np.array([sens.cell(r, 1).value for r in range(6, 14)
+                                  if sens.cell(r, 1).value is not None], dtype=float)
+    wb.close()
+    return m
+
+
+# Inputs that ``value`` reads; the rest of the model dict is metadata.
+SCALAR_INPUTS = ("base_revenue", "rd_pct", "sga_pct", "da_pct", "cash", "debt",
+                 "shares", "price", "wacc", "terminal_growth")
+VECTOR_INPUTS = tuple(PROJ_ROWS)
+
+
+def stack_models(models):
+    """Stack several companies' inputs along a new leading axis.
+
+    The result can be passed straight to ``value`` / ``sensitivity`` to
+    value every company in one vectorised call; ``company`` keeps the
+    names in the same order (e.g. for ``results.record``).
+    """
+    out = {k: np.array([m[k] for m in models], dtype=float) for k in SCALAR_INPUTS}
+    out.update({k: np.stack([np.asarray(m[k], dtype=float) for m in models]) for k in VECTOR_INPUTS})
+    out["company"] = [m.get("company", "ASML") for m in models]
+    return out
+
+
+def inputs_hash(m):
+    """Content hash of the inputs ``value`` reads, for caches and run records."""
+    payload = json.dumps({k: np.asarray(m[k]).tolist()
+                          for k in SCALAR_INPUTS + VECTOR_INPUTS}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_market_data(data_dir=DATA_DIR):
+    """Latest CAPM inputs written by 03_market_data.py, or None."""
+    path = os.path.join(data_dir, "market_data.csv")
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path).iloc[-1].to_dict()
+
+# ─────────────────────────────────────────────
+# 2.  PROJECTIONS
+# ─────────────────────────────────────────────
+
+def project(base_revenue, growth, gross_margin, rd_pct, sga_pct, tax_rate,
+            capex_pct, da_pct, nwc_pct):
+    """Revenue-to-FCF build, mirroring the Projections tab.
+
+    ``growth`` and the margin inputs broadcast over (..., years). Change in
+    NWC in the first year is the full NWC balance, as in Projections!B41.
+    """
+    growth = np.asarray(growth, dtype=float)
+    revenue = np.asarray(base_revenue, dtype=float)[..., None] * np.cumprod(1 + growth, axis=-1)
+    gross   = revenue * np.asarray(gross_margin)
+    opex    = revenue * (np.asarray(rd_pct) + np.asarray(sga_pct))[..., None]
+    ebit    = gross - opex
+    nopat   = ebit * (1 - np.asarray(tax_rate))
+    da      = revenue * np.asarray(da_pct)[..., None]
+    capex   = revenue * np.asarray(capex_pct)
+    nwc     = revenue * np.asarray(nwc_pct)
+    d_nwc   = np.diff(nwc, axis=-1, prepend=0.0)
+    fcf     = nopat + da - capex - d_nwc
+    return {"revenue": revenue, "ebit": ebit, "nopat": nopat, "fcf": fcf}
+
+# ─────────────────────────────────────────────
+# 3.  DISCOUNTING
+# ─────────────────────────────────────────────
+
+def discount(fcf, wacc, terminal_growth):
+    """PV of FCFs and Gordon-growth terminal value, as on the DCF tab."""
+    fcf  = np.asarray(fcf, dtype=float)
+    wacc = np.asarray(wacc, dtype=float)[..., None]
+    return discount_curve(fcf, np.broadcast_to(wacc, np.broadcast_shapes(wacc.shape, fcf.shape)),
+                          terminal_growth)
+
+
+def discount_curve(fcf, rates, terminal_growth):
+    """Discount each year's FCF at its own rate.
+
+    ``rates`` holds an annually compounded spot rate per projection year
+    (..., years) — e.g. from ``curve.wacc_curve``. The terminal value is
+    capitalised and discounted at the final year's rate.
+    """
+    fcf   = np.asarray(fcf, dtype=float)
+    rates = np.asarray(rates, dtype=float)
+    g     = np.asarray(terminal_growth, dtype=float)[..., None]
+    t     = np.arange(1, fcf.shape[-1] + 1)
+    df    = (1 + rates) ** -t
+    pv    = fcf * df
+    r_end = rates[..., -1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tv = fcf[..., -1:] * (1 + g) / (r_end - g)
+    pv_tv = (tv * df[..., -1:])[..., 0]
+    pv_fcfs = pv.sum(axis=-1)
+    return {
+        "discount_factors": df,
+        "pv_fcf":           pv,
+        "pv_fcfs":          pv_fcfs,
+        "terminal_value":   tv[..., 0],
+        "pv_tv":            pv_tv,
+        "ev":               pv_fcfs + pv_tv,
+    }
+
+
+def _project(p):
+    return project(p["base_revenue"], p["growth"], p["gross_margin"], p["rd_pct"],
+                   p["sga_pct"], p["tax_rate"], p["capex_pct"], p["da_pct"], p["nwc_pct"])
+
+
+def value(m, **overrides):
+    """Run the full DCF for model ``m``; any input may be overridden.
+
+    Pass ``rates`` (one discount rate per projection year) to discount on a
+    term structure instead of the flat WACC. Returns the projection and
+    discounting arrays plus the equity bridge.
+    """
+    p = {**m, **overrides}
+    proj = _project(p)
+    if p.get("rates") is not None:
+        disc = discount_curve(proj["fcf"], p["rates"], p["terminal_growth"])
+    else:
+        disc = discount(proj["fcf"], p["wacc"], p["terminal_growth"])
+    out = {**proj, **disc}
+    out["equity"] = out["ev"] + p["cash"] - p["debt"]
+    out["per_share"] = out["equity"] / p["shares"]
+    out["upside"] = out["per_share"] / p["price"] - 1
+    return out
+
+
+def sensitivity(m, waccs, growths, **overrides):
+    """Per-share value on a (growth × WACC) grid, like the Sensitivity tab.
+
+    The projection is computed once; for a stacked model the result has
+    shape (companies, growths, waccs).
+    """
+    p = {**m, **overrides}
+    waccs   = np.asarray(waccs, dtype=float)
+    growths = np.asarray(growths, dtype=float)
+    fcf = _project(p)["fcf"][..., None, None, :]
+    ev  = discount(fcf, waccs[None, :], growths[:, None])["ev"]
+    net = (np.asarray(p["cash"]) - np.asarray(p["debt"]))[..., None, None]
+    return (ev + net) / np.asarray(p["shares"])[..., None, None]
+
+
+def recommendation(upside):
+    """Executive Summary!B23: BUY above +10%, SELL below −10%."""
+    return "BUY" if upside > 0.1 else "SELL" if upside < -0.1 else "HOLD"
+
+
+if __name__ == "__main__":
+    m = load_model()
+    r = value(m)
+    print(f"\nEnterprise value:  €{r['ev']:,.0f}M")
+    print(f"Equity value:      €{r['equity']:,.0f}M")
+    print(f"Value per share:   €{r['per_share']:,.0f}  vs. price €{m['price']:,.0f} "
+          f"({r['upside']:+.0%}, {recommendation(r['upside'])})")
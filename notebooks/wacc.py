@@ -0,0 +1,238 @@
+"""
+ASML Valuation Analysis — WACC Engine
+Builds the full weighted average cost of capital from the stored financial
+statements (data/<ticker>_income.csv, data/<ticker>_balance.csv) instead of
+the CAPM-only shortcut: after-tax cost of debt, market-value weights, and
+Hamada unlevered / relevered betas. Book-value weights are only used when
+asked for (``equity_value=None``), never as a silent fallback.
+
+Everything is computed as (ticker × statement date) arrays in one pass and
+kept in a ``WACCTable``; backtests and batch valuations look values up from
+the table (as-of, vectorised) instead of recomputing them per call.
+
+Usage:
+    cd notebooks
+    python wacc.py                      # ASML WACC history from data/
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+import fx
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE     = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, "..", "data")
+
+MRP       = 0.065      # Damodaran, as in 03_market_data.py
+TAX_RATE  = 0.25       # fallback where the statements give no effective rate
+
+# field -> (statement, Yahoo row label)
+FIELDS = {
+    "total_debt":       ("balance", "Total Debt"),
+    "cash":             ("balance", "Cash And Cash Equivalents"),
+    "shares":           ("balance", "Ordinary Shares Number"),
+    "book_equity":      ("balance", "Stockholders Equity"),
+    "interest_expense": ("income",  "Interest Expense"),
+    "tax_rate":         ("income",  "Tax Rate For Calcs"),
+}
+
+# Statements are in the reporting currency; prices in the listing currency.
+REPORTING_CURRENCY = {"ASML": "EUR"}
+LISTING_CURRENCY   = {}
+DEFAULT_CURRENCY   = "USD"
+
+# ─────────────────────────────────────────────
+# 1.  FUNDAMENTALS STORE
+# ─────────────────────────────────────────────
+
+def _ffill(a):
+    """Forward-fill NaNs along the last axis."""
+    a = np.asarray(a, dtype=float)
+    idx = np.where(np.isnan(a), 0, np.arange(a.shape[-1]))
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    return np.take_along_axis(a, idx, axis=-1)
+
+
+def load_fundamentals(tickers=("ASML",), data_dir=DATA_DIR):
+    """Statement items for each ticker on a shared, sorted date axis.
+
+    Returns {"tickers", "dates", <field>: (tickers, dates) array}; a value
+    missing from a statement (or a statement missing entirely) is NaN.
+    """
+    frames = {}
+    for t in tickers:
+        for stmt in {s for s, _ in FIELDS.values()}:
+            path = os.path.join(data_dir, f"{t.lower()}_{stmt}.csv")
+            if os.path.exists(path):
+                frames[t, stmt] = pd.read_csv(path, index_col=0, parse_dates=True)
+    dates = sorted({d for f in frames.values() for d in f.index})
+    out = {"tickers": list(tickers), "dates": fx._as_days(pd.DatetimeIndex(dates))}
+    for field, (stmt, col) in FIELDS.items():
+        arr = np.full((len(tickers), len(dates)), np.nan)
+        for i, t in enumerate(tickers):
+            f = frames.get((t, stmt))
+            if f is not None and col in f:
+                arr[i] = f[col].reindex(dates).to_numpy(dtype=float)
+        out[field] = arr
+    return out
+
+
+def market_equity(fund, rates=None, data_dir=DATA_DIR):
+    """Market value of equity at each statement date, in reporting currency.
+
+    Uses the last close on or before the statement date from
+    data/<ticker>_prices.csv times shares outstanding. Dates before the
+    price history (or tickers without a price file) are NaN. A price that
+    needs converting without ``rates`` raises ValueError rather than
+    dropping the ticker.
+    """
+    dates = fund["dates"]
+    out = np.full(fund["shares"].shape, np.nan)
+    for i, t in enumerate(fund["tickers"]):
+        path = os.path.join(data_dir, f"{t.lower()}_prices.csv")
+        if not os.path.exists(path):
+            continue
+        px = pd.read_csv(path)
+        px_dates = fx._as_days(pd.to_datetime(px["Date"], utc=True))
+        close = px["Close"].to_numpy(dtype=float)
+        pos = np.searchsorted(px_dates, dates, side="right") - 1
+        price = np.where(pos >= 0, close[np.clip(pos, 0, None)], np.nan)
+        src = LISTING_CURRENCY.get(t, DEFAULT_CURRENCY)
+        dst = REPORTING_CURRENCY.get(t, DEFAULT_CURRENCY)
+        if src != dst:
+            if rates is None:
+                raise ValueError(f"No FX rates to convert {t} prices from {src} to {dst} "
+                                 "(run fx.py)")
+            price = rates.convert(price, src, dst, dates)
+        out[i] = price * fund["shares"][i]
+    return out
+
+# ─────────────────────────────────────────────
+# 2.  BUILDING BLOCKS (all broadcast)
+# ─────────────────────────────────────────────
+
+def capm(rf, beta, mrp=MRP):
+    return rf + beta * mrp
+
+
+def cost_of_debt(interest_expense, total_debt, tax_rate):
+    """Pre-tax Rd = interest / debt (as on the WACC tab) and Rd × (1 − T)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pre = np.where(total_debt > 0, interest_expense / total_debt, np.nan)
+    return pre, pre * (1 - tax_rate)
+
+
+def unlever(beta, de, tax_rate):
+    """Hamada: βu = βL / (1 + (1 − T) · D/E)."""
+    return beta / (1 + (1 - tax_rate) * de)
+
+
+def relever(beta_u, de, tax_rate):
+    """Hamada: βL = βu · (1 + (1 − T) · D/E)."""
+    return beta_u * (1 + (1 - tax_rate) * de)
+
+# ─────────────────────────────────────────────
+# 3.  WACC TABLE
+# ─────────────────────────────────────────────
+
+class WACCTable:
+    """(ticker × date) arrays from one ``compute`` call, with as-of lookups."""
+
+    def __init__(self, tickers, dates, arrays):
+        self.tickers = list(tickers)
+        self.dates = dates
+        self.arrays = arrays
+        self._row = {t: i for i, t in enumerate(self.tickers)}
+
+    def __getitem__(self, field):
+        return self.arrays[field]
+
+    def get(self, field, tickers, dates):
+        """Values for paired (ticker, date) arrays; dates resolve as-of."""
+        rows = np.array([self._row[t] for t in np.atleast_1d(tickers)])
+        cols = np.searchsorted(self.dates, fx._as_days(dates), side="right") - 1
+        rows, cols = np.broadcast_arrays(rows, cols)
+        out = self.arrays[field][rows, np.clip(cols, 0, None)]
+        return np.where(cols >= 0, out, np.nan)
+
+    def latest(self, ticker):
+        """Every field at the ticker's most recent date with a finite WACC."""
+        i = self._row[ticker]
+        ok = np.flatnonzero(np.isfinite(self.arrays["wacc"][i]))
+        j = ok[-1] if len(ok) else -1
+        return {k: float(v[i, j]) for k, v in self.arrays.items()}
+
+    def frame(self, field):
+        return pd.DataFrame(self.arrays[field], index=self.tickers,
+                            columns=pd.DatetimeIndex(self.dates))
+
+
+def compute(fund, beta, rf, mrp=MRP, equity_value=None, target_de=None, pooled=False):
+    """Full WACC for every (ticker, date) in ``fund`` in one vectorised pass.
+
+    beta          observed (levered) equity beta — scalar, (tickers,) or
+                  (tickers, dates)
+    rf            risk-free rate — scalar or (dates,)
+    equity_value  market value of equity, (tickers, dates); where it is NaN
+                  the weights and WACC are NaN. Pass None to weight on book
+                  equity throughout
+    target_de     relever at this D/E instead of each company's own
+    pooled        relever the cross-sectional median unlevered beta per
+                  date (peer-beta method) instead of each company's own
+    """
+    shape = fund["total_debt"].shape
+    beta = np.asarray(beta, dtype=float)
+    if beta.ndim == 1:
+        beta = beta[:, None]
+    beta = np.broadcast_to(beta, shape)
+    rf = np.broadcast_to(np.asarray(rf, dtype=float), shape)
+
+    tax = _ffill(fund["tax_rate"])
+    tax = np.where(np.isfinite(tax), tax, TAX_RATE)
+    debt = np.nan_to_num(fund["total_debt"])
+    equity = fund["book_equity"] if equity_value is None else np.asarray(equity_value, dtype=float)
+
+    rd_pre, _ = cost_of_debt(fund["interest_expense"], debt, tax)
+    rd_pre = _ffill(rd_pre)
+    rd_post = rd_pre * (1 - tax)
+
+    value = equity + debt
+    we, wd = equity / value, debt / value
+    de = debt / equity
+
+    beta_u = unlever(beta, de, tax)
+    if pooled:
+        beta_u = np.broadcast_to(np.nanmedian(beta_u, axis=0), shape)
+    beta_l = relever(beta_u, de if target_de is None else target_de, tax)
+    re = capm(rf, beta_l, mrp)
+    wacc = we * re + wd * np.nan_to_num(rd_post)
+
+    return WACCTable(fund["tickers"], fund["dates"], {
+        "tax_rate":        tax,
+        "pre_tax_cost_of_debt": rd_pre,
+        "after_tax_cost_of_debt": rd_post,
+        "equity_weight":   we,
+        "debt_weight":     wd,
+        "debt_to_equity":  de,
+        "unlevered_beta":  beta_u,
+        "relevered_beta":  beta_l,
+        "cost_of_equity":  re,
+        "wacc":            wacc,
+    })
+
+
+if __name__ == "__main__":
+    market = pd.read_csv(os.path.join(DATA_DIR, "market_data.csv")).iloc[-1]
+    fund = load_fundamentals(["ASML"])
+    table = compute(fund, beta=market["beta"], rf=market["risk_free_rate"],
+                    mrp=market["market_risk_premium"],
+                    equity_value=market_equity(fund, fx.load_or_fetch()))
+    print("\nASML WACC by statement date")
+    cols = ["pre_tax_cost_of_debt", "after_tax_cost_of_debt", "equity_weight",
+            "unlevered_beta", "cost_of_equity", "wacc"]
+    print(pd.DataFrame({c: table.frame(c).loc["ASML"] for c in cols}).round(4).to_string())
@@ -0,0 +1,598 @@
+"""
+ASML Valuation Analysis — Per-Company Workbook Generator
+Uses models/ASML_DCF_Model.xlsx as a template and writes one populated
+DCF workbook per company. Tabs, formulas, formats, the chart and the
+Power Query parts are kept as they are.
+
+The workbook is never loaded into openpyxl. Each output is streamed
+part by part from the template zip:
+
+    - untouched parts (styles, theme, chart, calcChain, customXml …) are
+      copied through in chunks;
+    - each worksheet has its input cells rewritten in place (historicals,
+      projection assumptions, WACC inputs, comparables, sensitivity grid);
+    - formula cells lose their stale cached values and the workbook is
+      flagged ``fullCalcOnLoad``, so Excel recalculates every tab on open.
+
+The formula cells ``valuation.load_model`` reads (R&D / SG&A averages,
+margins, FCF, WACC weights, the DCF outputs) are given freshly computed
+cached values, so the generated files also feed report.py --batch and
+batch_charts.py before anyone opens them in Excel. Memory per worker is
+one template's worth of XML regardless of how many workbooks are written,
+and companies are spread over a process pool.
+
+The company ticker is stored as the workbook title (docProps/core.xml);
+text on the tabs has "ASML" and the currency swapped for the company's.
+The Power Query tables below row 75 of Historical Financials still hold
+the template's ASML statements until refreshed.
+
+Usage:
+    cd notebooks
+    python workbooks.py                        # every multiples.UNIVERSE ticker
+    python workbooks.py AMAT LRCX KLAC         # selected tickers
+    python workbooks.py --bench 200 -j 4       # copies of the ASML inputs, no network
+
+Output:
+    ../outputs/workbooks/<TICKER>_DCF_Model.xlsx
+    ../outputs/workbooks/manifest.csv
+"""
+
+import os
+import re
+import time
+import shutil
+import zipfile
+import argparse
+import datetime as dt
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from xml.sax.saxutils import escape
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import openpyxl
+
+import fx
+import wacc
+import valuation
+
+# ─────────────────────────────────────────────
+# 0.  CONFIG
+# ─────────────────────────────────────────────
+
+HERE          = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_PATH = valuation.EXCEL_PATH
+OUT_DIR       = os.path.join(HERE, "..", "outputs", "workbooks")
+
+HIST_YEARS = 5                        # Historical Financials columns B-F
+HIST_COLS  = "BCDEF"
+PROJ_COLS  = "BCDEFGHIJK"             # Projections 2026E-2035E
+COMP_COLS  = "ABCDEFG"                # Comparables: name, mcap … beta
+COMP_FIELDS = ("name", "mcap", "ev_ebitda", "pe", "ev_rev", "gm", "beta")
+PEER_ROWS  = (6, 7, 8)
+
+# field -> (template row, Yahoo statement, Yahoo row label), in EUR/USD millions
+HIST_ROWS = {
+    "revenue":           (6,  "income",   "Total Revenue"),
+    "cost_of_sales":     (7,  "income",   "Cost Of Revenue"),
+    "gross_profit":      (8,  "income",   "Gross Profit"),
+    "rd":                (9,  "income",   "Research And Development"),
+    "sga":               (10, "income",   "Selling General And Administration"),
+    "ebitda":            (11, "income",   "EBITDA"),
+    "ebit":              (12, "income",   "Operating Income"),
+    "net_income":        (15, "income",   "Net Income"),
+    "total_assets":      (17, "balance",  "Total Assets"),
+    "ppe":               (18, "balance",  "Net PPE"),
+    "cash":              (19, "balance",  "Cash Cash Equivalents And Short Term Investments"),
+    "total_liabilities": (20, "balance",  "Total Liabilities Net Minority Interest"),
+    "total_equity":      (21, "balance",  "Stockholders Equity"),
+    "shares":            (22, "balance",  "Ordinary Shares Number"),
+    "operating_cf":      (24, "cashflow", "Operating Cash Flow"),
+    "capex":             (25, "cashflow", "Capital Expenditure"),
+}
+
+# Projections input rows; 11 and 16 are shown on the tab but feed no formula.
+PROJ_ROWS = {**valuation.PROJ_ROWS, "ebit_margin": 11, "da_ppe_pct": 16}
+
+# Workbook peers and their tickers; a company that is itself one of them
+# gets ASML in its place.
+TEMPLATE_PEERS = {"Applied Materials": "AMAT", "LAM Research": "LRCX", "KLA Corp": "KLAC"}
+
+# Cells whose template style does not fit the value written (2023 is text).
+FIX_STYLES = {("Historical Financials", "D4"): b"42"}
+
+CURRENCY_FORMATS = {"EUR": "[$€-2]", "USD": "[$$-409]", "GBP": "[$£-809]",
+                    "JPY": "[$¥-411]", "KRW": "[$₩-412]", "TWD": "[$NT$-404]"}
+CURRENCY_SYMBOLS = {"EUR": "€", "USD": "$", "GBP": "£", "JPY": "¥", "KRW": "₩"}
+COPY_CHUNK = 1 << 16
+
+# ─────────────────────────────────────────────
+# 1.  COMPANY INPUTS
+# ─────────────────────────────────────────────
+# A "spec" is a flat dict: company, name, currency, hist_dates, hist
+# ({field: (5,) array}), proj ({field: (10,) array}), the WACC / DCF
+# inputs, the company's own comparables row and its peers.
+
+def _excel_date(v):
+    if isinstance(v, str):
+        return pd.to_datetime(v, dayfirst=True).date()
+    return None if v is None else pd.Timestamp(v).date()
+
+
+def from_workbook(path=TEMPLATE_PATH):
+    """Spec holding the inputs of an existing workbook (the template by default)."""
+    wb = openpyxl.load_workbook(path, data_only=True)
+    hist, proj, dcf = wb["Historical Financials"], wb["Projections"], wb["DCF Calculation"]
+    wacc_ws, comp = wb["WACC"], wb["Comparables"]
+    num = lambda c: np.nan if c.value is None else float(c.value)
+
+    def comp_row(r):
+        return {k: comp[f"{c}{r}"].value for k, c in zip(COMP_FIELDS, COMP_COLS)}
+
+    spec = {
+        "company":    wb.properties.title or "ASML",
+        "name":       wb["Executive Summary"]["A1"].value.split(" - ")[0],
+        "currency":   "EUR",
+        "hist_dates": [_excel_date(hist[f"{c}4"].value) for c in HIST_COLS],
+        "hist":  {k: np.array([num(hist[f"{c}{r}"]) for c in HIST_COLS])
+                  for k, (r, _, _) in HIST_ROWS.items()},
+        "proj":  {k: np.array([num(proj[f"{c}{r}"]) for c in PROJ_COLS])
+                  for k, r in PROJ_ROWS.items()},
+        "terminal_growth":  num(dcf["B20"]),
+        "shares":           num(dcf["D39"]),
+        "price":            num(dcf["D42"]),
+        "risk_free":        num(wacc_ws["C7"]),
+        "beta":             num(wacc_ws["C8"]),
+        "mrp":              num(wacc_ws["C9"]),
+        "interest_expense": num(wacc_ws["C16"]),
+        "total_debt":       num(wacc_ws["C17"]),
+        "tax_rate":         num(wacc_ws["C20"]),
+        "wacc":             num(wacc_ws["C36"]),
+        "own":   comp_row(5),
+        "peers": [comp_row(r) for r in PEER_ROWS],
+    }
+    wb.close()
+    return spec
+
+
+def _statement_row(frame, label, dates, scale=1e6):
+    if frame is None or label not in frame.index:
+        return np.full(len(dates), np.nan)
+    return frame.loc[label].reindex(dates).to_numpy(dtype=float) / scale
+
+
+def from_yahoo(ticker, base, rates=None, market=None):
+    """Spec for ``ticker`` from Yahoo statements, on the ``base`` assumptions.
+
+    Historicals, price, shares, beta, debt and the company's comparables row
+    come from Yahoo; margins and CapEx intensity are the company's own
+    historical averages; revenue growth, tax and NWC paths and terminal
+    growth are the base (template) assumptions. Prices quoted in another
+    currency than the statements are converted with ``rates``.
+    """
+    import yfinance as yf
+
+    t = yf.Ticker(ticker)
+    info = t.info
+    stmts = {"income": t.financials, "balance": t.balance_sheet, "cashflow": t.cashflow}
+    dates = sorted(stmts["income"].columns)[-HIST_YEARS:]
+    dates = [None] * (HIST_YEARS - len(dates)) + list(dates)
+    hist = {k: _statement_row(stmts[s], label, dates) for k, (_, s, label) in HIST_ROWS.items()}
+    hist["capex"] = np.abs(hist["capex"])
+    if not np.isfinite(hist["revenue"][-1]):
+        raise ValueError("no revenue for the latest fiscal year")
+
+    quote_ccy = info.get("currency", "USD")
+    report_ccy = info.get("financialCurrency", quote_ccy)
+    price = info.get("currentPrice") or info.get("regularMarketPrice")
+    mcap = info.get("marketCap") or np.nan
+    if quote_ccy != report_ccy:
+        if rates is None:
+            raise ValueError(f"no FX rates to convert {quote_ccy} to {report_ccy}")
+        price = rates.convert(price, quote_ccy, report_ccy)
+    if quote_ccy != "USD" and rates is not None:
+        mcap = rates.convert(mcap, quote_ccy, "USD")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg = lambda a: float(np.nanmean(a / hist["revenue"]))
+        gross_margin, ebit_margin, capex_pct = avg(hist["gross_profit"]), avg(hist["ebit"]), avg(hist["capex"])
+    flat = lambda v, key: np.full(len(PROJ_COLS), v) if np.isfinite(v) else base["proj"][key]
+    proj = {**base["proj"],
+            "gross_margin": flat(gross_margin, "gross_margin"),
+            "ebit_margin":  flat(ebit_margin, "ebit_margin"),
+            "capex_pct":    flat(capex_pct, "capex_pct")}
+
+    tax = _statement_row(stmts["income"], "Tax Rate For Calcs", dates, scale=1)[-1]
+    tax = tax if np.isfinite(tax) else base["tax_rate"]
+    rf = float(market["risk_free_rate"]) if market is not None else base["risk_free"]
+    mrp = float(market["market_risk_premium"]) if market is not None else base["mrp"]
+    beta = info.get("beta") or base["beta"]
+    debt = _statement_row(stmts["balance"], "Total Debt", dates)[-1]
+    interest = abs(_statement_row(stmts["income"], "Interest Expense", dates)[-1])
+    shares = (info.get("sharesOutstanding") or np.nan) / 1e6
+
+    spec = {
+        "company":    ticker,
+        "name":       (info.get("longName") or ticker).upper(),
+        "currency":   report_ccy,
+        "hist_dates": [None if d is None else pd.Timestamp(d).date() for d in dates],
+        "hist":       hist,
+        "proj":       proj,
+        "terminal_growth":  base["terminal_growth"],
+        "shares":           shares,
+        "price":            float(price),
+        "risk_free":        rf,
+        "beta":             float(beta),
+        "mrp":              mrp,
+        "interest_expense": float(np.nan_to_num(interest)),
+        "total_debt":       float(np.nan_to_num(debt)),
+        "tax_rate":         float(tax),
+        "own": {"name": ticker, "mcap": mcap / 1e9, "ev_ebitda": None,
+                "pe": info.get("trailingPE"), "ev_rev": info.get("enterpriseToRevenue"),
+                "gm": info.get("grossMargins"), "beta": beta},
+    }
+    spec["wacc"] = _wacc(spec)["wacc"]
+    peers = [p for p in base["peers"] if TEMPLATE_PEERS.get(p["name"]) != ticker]
+    if len(peers) < len(PEER_ROWS):
+        peers.insert(0, base["own"])
+    spec["peers"] = peers[:len(PEER_ROWS)]
+    return spec
+
+# ─────────────────────────────────────────────
+# 2.  CELL VALUES
+# ─────────────────────────────────────────────
+
+def _wacc(spec):
+    """The WACC tab's formulas (C11 … C33) plus the C36 blend."""
+    re_ = wacc.capm(spec["risk_free"], spec["beta"], spec["mrp"])
+    rd, rd_post = wacc.cost_of_debt(spec["interest_expense"], spec["total_debt"], spec["tax_rate"])
+    e, d = spec["price"] * spec["shares"], spec["total_debt"]
+    we, wd = e / (e + d), d / (e + d)
+    return {"C11": re_, "C19": float(rd), "C22": float(rd_post), "C27": e, "C28": d,
+            "C30": e + d, "C32": we, "C33": wd,
+            "wacc": float(we * re_ + wd * np.nan_to_num(rd_post))}
+
+
+def _cached_comparables(spec):
+    return {"C5": _wacc(spec)["C30"] / spec["hist"]["ebitda"][-1]}
+
+
+def to_model(spec):
+    """The ``valuation`` inputs of a spec, as ``valuation.load_model`` returns them."""
+    h = spec["hist"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = lambda a: float(np.nanmean(a / h["revenue"]))
+        rd_pct, sga_pct = ratio(h["rd"]), ratio(h["sga"])
+    w = _wacc(spec)
+    m = {k: np.asarray(spec["proj"][k], dtype=float) for k in valuation.PROJ_ROWS}
+    m.update({
+        "company": spec["company"], "currency": spec["currency"],
+        "base_revenue": float(h["revenue"][-1]),
+        "rd_pct": rd_pct, "sga_pct": sga_pct, "da_pct": 0.03,
+        "cash": float(h["cash"][-1]), "debt": float(h["total_liabilities"][-1]),
+        "shares": spec["shares"], "price": spec["price"],
+        "wacc": spec["wacc"], "terminal_growth": spec["terminal_growth"],
+        "cost_of_equity": w["C11"], "cost_of_debt": w["C19"], "equity_weight": w["C32"],
+    })
+    return m
+
+
+def cells(spec, sens_waccs, sens_growths):
+    """{sheet: {cell: value}} for every input and cached formula cell written.
+
+    ``None`` clears a cell; dates become Excel serials; strings are
+    written inline.
+    """
+    h, m = spec["hist"], to_model(spec)
+    r = valuation.value(m)
+    grid = valuation.sensitivity(m, sens_waccs, sens_growths)
+    w = _wacc(spec)
+    ccy = spec["currency"]
+    sym = CURRENCY_SYMBOLS.get(ccy, f"{ccy} ")
+
+    hist = {f"{c}4": d for c, d in zip(HIST_COLS, spec["hist_dates"])}
+    for k, (row, _, _) in HIST_ROWS.items():
+        hist.update({f"{c}{row}": v for c, v in zip(HIST_COLS, h[k])})
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rev = h["revenue"]
+        derived = {9: h["rd"] / rev, 11: h["sga"] / rev}      # spilled I:M arrays
+        for row, a in derived.items():
+            hist.update({f"{c}{row}": v for c, v in zip("IJKLM", a)})
+        hist["I10"], hist["I12"] = m["rd_pct"], m["sga_pct"]
+        rows = {31: h["gross_profit"] / rev, 32: h["ebit"] / rev,
+                33: h["net_income"] / rev, 36: h["operating_cf"] - h["capex"]}
+        for row, a in rows.items():
+            hist.update({f"{c}{row}": v for c, v in zip(HIST_COLS, a)})
+        hist.update({f"{c}34": v for c, v in zip(HIST_COLS[1:], rev[1:] / rev[:-1] - 1)})
+
+    proj = {f"{c}{row}": v for k, row in PROJ_ROWS.items()
+            for c, v in zip(PROJ_COLS, spec["proj"][k])}
+
+    dcf = {"B20": spec["terminal_growth"], "D39": spec["shares"], "D42": spec["price"],
+           "D3": spec["wacc"], "D16": r["pv_fcfs"], "D22": r["terminal_value"],
+           "D23": r["pv_tv"], "D29": r["ev"], "D36": r["equity"],
+           "D40": r["per_share"], "D43": r["upside"]}
+
+    wacc_tab = {"C7": spec["risk_free"], "C8": spec["beta"], "C9": spec["mrp"],
+                "C16": spec["interest_expense"], "C17": spec["total_debt"],
+                "C20": spec["tax_rate"], "C36": spec["wacc"],
+                **{k: v for k, v in w.items() if k != "wacc"}}
+
+    own = {**spec["own"], "name": spec["company"]}
+    comp = {f"{c}5": own[k] for k, c in zip(COMP_FIELDS, COMP_COLS) if k != "ev_ebitda"}
+    comp.update(_cached_comparables(spec))
+    for row, p in zip(PEER_ROWS, spec["peers"] + [{}] * len(PEER_ROWS)):
+        comp.update({f"{c}{row}": p.get(k) for k, c in zip(COMP_FIELDS, COMP_COLS)})
+
+    sens = {f"{c}{6 + i}": v for i, vals in enumerate(grid)
+            for c, v in zip("BCDEFGHIJKL", vals)}
+    gi = np.abs(sens_growths - spec["terminal_growth"]).argmin()
+    wi = np.abs(sens_waccs - spec["wacc"]).argmin()
+    sens.update({
+        "P8":  r["per_share"],
+        "A15": f"Current Market Price: {sym}{spec['price']:,.0f}",
+        "A20": f"Valuation ranges from {sym}{np.nanmin(grid):,.0f} (most conservative) "
+               f"to {sym}{np.nanmax(grid):,.0f} (most aggressive)",
+        "A21": f"Base case ({sens_waccs[wi]:.1%} WACC, {sens_growths[gi]:.1%} growth) "
+               f"yields {sym}{grid[gi, wi]:,.0f} per share",
+    })
+
+    sources = {
+        "B4":  f"{sym}{rev[-1]:,.0f}M",
+        "B8":  spec["proj"]["gross_margin"][0], "B9":  spec["proj"]["ebit_margin"][0],
+        "B10": spec["proj"]["tax_rate"][0],     "B11": spec["proj"]["capex_pct"][0],
+        "B12": spec["proj"]["nwc_pct"][0],
+        "B14": spec["risk_free"], "B15": spec["beta"], "B16": spec["mrp"],
+        "B17": w["C11"], "B18": w["C19"], "B20": spec["terminal_growth"],
+        "B21": spec["price"], "B22": f"{spec['shares']:,.0f}M",
+        "B38": dt.date.today(),
+    }
+    return {"Historical Financials": hist, "Projections": proj, "DCF Calculation": dcf,
+            "WACC": wacc_tab, "Comparables": comp, "Sensitivity": sens,
+            "Data & Sources": sources}
+
+
+def text_replacements(spec):
+    """Shared-string substitutions that re-label the template's text."""
+    out = []
+    if spec["company"] != "ASML":
+        out += [("ASML HOLDING NV", spec["name"]), ("ASML", spec["company"])]
+    if spec["currency"] != "EUR":
+        out += [("EUR", spec["currency"]),
+                ("€", CURRENCY_SYMBOLS.get(spec["currency"], spec["currency"] + " "))]
+    return out
+
+# ─────────────────────────────────────────────
+# 3.  STREAMING XML WRITER
+# ─────────────────────────────────────────────
+
+NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+      "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+      "rel": "http://schemas.openxmlformats.org/package/2006/relationships"}
+
+CELL_RE    = re.compile(rb'<c r="([A-Z]+[0-9]+)"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+FORMULA_RE = re.compile(rb"<f[^>]*?(?:/>|>.*?</f>)", re.S)
+TYPE_RE    = re.compile(rb'\s+t="[^"]*"')
+STYLE_RE   = re.compile(rb's="[0-9]+"')
+TEXT_RE    = re.compile(rb"(<t(?:\s[^>]*)?>)(.*?)(</t>)", re.S)
+EXCEL_EPOCH = dt.date(1899, 12, 30)
+
+
+@lru_cache(maxsize=4)
+def sheet_parts(template=TEMPLATE_PATH):
+    """{sheet name: zip part} from the template's workbook.xml and its rels."""
+    with zipfile.ZipFile(template) as z:
+        book = ET.fromstring(z.read("xl/workbook.xml"))
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+    targets = {r.get("Id"): r.get("Target") for r in rels.findall("rel:Relationship", NS)}
+    rid = f"{{{NS['r']}}}id"
+    return {s.get("name"): "xl/" + targets[s.get(rid)].lstrip("/").removeprefix("xl/")
+            for s in book.find("m:sheets", NS)}
+
+
+def _value_xml(v):
+    """(extra attributes, inner XML) for one cell value; None if blank."""
+    if v is None:
+        return None
+    if isinstance(v, (dt.date, pd.Timestamp)):
+        v = (pd.Timestamp(v).date() - EXCEL_EPOCH).days
+    if isinstance(v, str):
+        return b' t="inlineStr"', b'<is><t xml:space="preserve">' + escape(v).encode() + b"</t></is>"
+    v = float(v)
+    return (b"", b"<v>" + repr(v).encode() + b"</v>") if np.isfinite(v) else None
+
+
+def rewrite_sheet(xml, edits, sheet=None):
+    """Apply ``edits`` ({cell: value}) to one worksheet's XML.
+
+    Formula cells keep their formula; they get the edited value as cached
+    value, or lose the stale one. Raises KeyError for a cell the template
+    does not have.
+    """
+    done = set()
+
+    def cell(match):
+        ref, attrs, body = match.group(1).decode(), match.group(2), match.group(3) or b""
+        formula = FORMULA_RE.search(body)
+        if ref in edits:
+            done.add(ref)
+            val = _value_xml(edits[ref])
+        elif formula is None:
+            return match.group(0)
+        else:
+            val = None
+        attrs = TYPE_RE.sub(b"", attrs)
+        style = FIX_STYLES.get((sheet, ref))
+        if style is not None:
+            attrs = STYLE_RE.sub(b's="' + style + b'"', attrs)
+        head = b'<c r="' + ref.encode() + b'"' + attrs
+        if formula is not None:
+            cached = b"" if val is None or val[0] else val[1]
+            return head + b">" + formula.group(0) + cached + b"</c>"
+        if val is None:
+            return head + b"/>"
+        return head + val[0] + b">" + val[1] + b"</c>"
+
+    out = CELL_RE.sub(cell, xml)
+    missing = set(edits) - done
+    if missing:
+        raise KeyError(f"{sheet}: cells not in template: {sorted(missing)}")
+    return out
+
+
+def _replace_text(xml, pairs):
+    pairs = [(escape(a).encode(), escape(b).encode()) for a, b in pairs]
+
+    def text(match):
+        t = match.group(2)
+        for a, b in pairs:
+            t = t.replace(a, b)
+        return match.group(1) + t + match.group(3)
+
+    return TEXT_RE.sub(text, xml) if pairs else xml
+
+
+def _full_calc(xml):
+    """Flag the workbook for a full recalculation when Excel opens it."""
+    if b"fullCalcOnLoad" in xml:
+        return xml
+    return re.sub(rb"<calcPr\b", b'<calcPr fullCalcOnLoad="1"', xml, count=1)
+
+
+def _core_props(xml, title):
+    now = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ").encode()
+    xml = re.sub(rb"<dc:title>.*?</dc:title>", b"", xml)
+    xml = re.sub(rb"(<dcterms:modified[^>]*>).*?(</dcterms:modified>)",
+                 rb"\g<1>" + now + rb"\g<2>", xml)
+    return xml.replace(b"</cp:coreProperties>",
+                       b"<dc:title>" + escape(title).encode() + b"</dc:title></cp:coreProperties>")
+
+
+def _currency_formats(xml, currency):
+    new = CURRENCY_FORMATS.get(currency, f"[${currency}]").encode()
+    return re.sub(rb"\[\$\xe2\x82\xac-[0-9]+\]", lambda _: new, xml)
+
+
+def write(spec, out_path, template=TEMPLATE_PATH, sens_waccs=None, sens_growths=None):
+    """Stream the template into ``out_path`` with ``spec``'s inputs.
+
+    Written to a temporary file and moved into place, so a failed refresh
+    never leaves a truncated workbook behind. Returns ``out_path``.
+    """
+    if sens_waccs is None or sens_growths is None:
+        sens_waccs, sens_growths = _sensitivity_axes(template)
+    edits = cells(spec, sens_waccs, sens_growths)
+    parts = sheet_parts(template)
+    transforms = {parts[name]: (lambda x, e=e, n=name: rewrite_sheet(x, e, n))
+                  for name, e in edits.items()}
+    transforms["xl/workbook.xml"] = _full_calc
+    transforms["docProps/core.xml"] = lambda x: _core_props(x, spec["company"])
+    pairs = text_replacements(spec)
+    if pairs:
+        transforms["xl/sharedStrings.xml"] = lambda x: _replace_text(x, pairs)
+    if spec["currency"] != "EUR":
+        transforms["xl/styles.xml"] = lambda x: _currency_formats(x, spec["currency"])
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp = out_path + ".tmp"
+    with zipfile.ZipFile(template) as zin, \
+         zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zout:
+        for info in zin.infolist():
+            target = zipfile.ZipInfo(info.filename, info.date_time)
+            target.compress_type = zipfile.ZIP_DEFLATED
+            fn = transforms.get(info.filename)
+            if fn is None:
+                with zin.open(info) as src, zout.open(target, "w") as dst:
+                    shutil.copyfileobj(src, dst, COPY_CHUNK)
+            else:
+                zout.writestr(target, fn(zin.read(info)))
+    os.replace(tmp, out_path)
+    return out_path
+
+
+@lru_cache(maxsize=4)
+def _sensitivity_axes(template=TEMPLATE_PATH):
+    m = valuation.load_model(template)
+    return m["sens_waccs"], m["sens_growths"]
+
+# ─────────────────────────────────────────────
+# 4.  BATCH REFRESH
+# ─────────────────────────────────────────────
+
+_WORKER = {}
+
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(name)).strip("_") or "company"
+
+
+def _init(out_dir, offline):
+    """Per-process state: the base spec, FX rates and market data, loaded once."""
+    _WORKER.update(out_dir=out_dir, base=from_workbook(),
+                   rates=None if offline else fx.load(),
+                   market=None if offline else valuation.load_market_data())
+
+
+def _build(job):
+    """Write one workbook; returns its manifest row, or an error string."""
+    ticker, label = job
+    w = _WORKER
+    try:
+        spec = w["base"] if ticker is None else from_yahoo(ticker, w["base"], w["rates"], w["market"])
+        path = write(spec, os.path.join(w["out_dir"], f"{_slug(label)}_DCF_Model.xlsx"))
+    except Exception as e:          # delisted tickers, missing statements
+        return f"{label}: {e}"
+    m = to_model(spec)
+    r = valuation.value(m)
+    return {"company": spec["company"], "name": spec["name"], "currency": spec["currency"],
+            "as_of": str(dt.date.today()), "per_share": float(r["per_share"]),
+            "price": spec["price"], "upside": float(r["upside"]), "wacc": spec["wacc"],
+            "inputs_hash": valuation.inputs_hash(m), "path": os.path.basename(path)}
+
+
+def build(tickers, out_dir=OUT_DIR, workers=1, bench=False):
+    """Write a workbook per ticker over a process pool; returns (manifest, errors).
+
+    With ``bench`` the tickers are only labels and every workbook carries
+    the template's own inputs (no network).
+    """
+    jobs = [(None if bench else t, t) for t in tickers]
+    args = (out_dir, bench)
+    if workers <= 1:
+        _init(*args)
+        rows = list(map(_build, jobs))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init, initargs=args) as pool:
+            rows = list(pool.map(_build, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    ok = [r for r in rows if isinstance(r, dict)]
+    manifest = pd.DataFrame(ok).sort_values("company") if ok else pd.DataFrame()
+    return manifest, [r for r in rows if isinstance(r, str)]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("tickers", nargs="*", metavar="TICKER")
+    ap.add_argument("--bench", type=int, metavar="N",
+                    help="write N copies of the template's inputs to time the generator")
+    ap.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default=OUT_DIR)
+    args = ap.parse_args()
+
+    if args.bench:
+        tickers = [f"ASML_{k:04d}" for k in range(args.bench)]
+    else:
+        import multiples
+        tickers = args.tickers or list(multiples.UNIVERSE)
+
+    t0 = time.perf_counter()
+    manifest, errors = build(tickers, args.out, args.workers, bench=bool(args.bench))
+    secs = time.perf_counter() - t0
+    for e in errors:
+        print(f"   Warning: {e} — skipped")
+    if len(manifest) and not args.bench:
+        manifest.to_csv(os.path.join(args.out, "manifest.csv"), index=False)
+        print(manifest[["company", "currency", "per_share", "price", "upside", "wacc"]]
+              .round(3).to_string(index=False))
+    print(f"  ✓  {len(manifest)} workbooks in {secs:.1f}s "
+          f"— {len(manifest) / secs * 60:,.0f}/min, {args.workers} worker(s)")